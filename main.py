@@ -1,24 +1,29 @@
 import os
+import sys
+import re
 import json
 import logging
+import argparse
+import hashlib
+import difflib
+import codecs
+import random
+import struct
+import shutil
+import functools
+import itertools
+import urllib.parse
+from collections import OrderedDict, deque
 import customtkinter as ctk
 from tkinter import filedialog, messagebox, simpledialog
-from typing import Dict, Any, Set, Optional, List
+from typing import Dict, Any, Iterable, Set, Optional, List, Tuple
 import threading
 import time
 import platform
-import subprocess
 import tkinter as tk
 
-try:
-    from watchdog.observers import Observer
-    from watchdog.events import FileSystemEventHandler
-except ImportError:
-    messagebox.showerror(
-        "Missing Dependency",
-        "The 'watchdog' library is required for file monitoring. Please install it using 'pip install watchdog'."
-    )
-    exit()
+# watchdog, subprocess, http.server and the process pool modules are imported
+# where they are used, so that the window can appear before they are loaded
 
 logging.basicConfig(level=logging.INFO)
 
@@ -44,7 +49,8 @@ COLORS = {
     }
 }
 
-class FileChangeHandler(FileSystemEventHandler):
+class FileChangeHandler:
+    # Combined with watchdog's FileSystemEventHandler in start_observer()
     def __init__(self, app):
         super().__init__()
         self.app = app
@@ -53,6 +59,2412 @@ class FileChangeHandler(FileSystemEventHandler):
         # Schedule the files_changed update on the main thread
         self.app.root.after(0, self.app.set_files_changed)
 
+
+APP_NAME = "FileCollector"
+
+
+@functools.lru_cache(maxsize=None)
+def config_dir() -> str:
+    """Per-user directory for settings, projects and run history.
+
+    FILE_COLLECTOR_CONFIG_DIR overrides the platform default, e.g. for a
+    portable install.
+    """
+    path = os.environ.get("FILE_COLLECTOR_CONFIG_DIR")
+    if not path:
+        if platform.system() == "Windows":
+            base = os.environ.get("APPDATA") or os.path.expanduser("~")
+            path = os.path.join(base, APP_NAME)
+        elif platform.system() == "Darwin":
+            path = os.path.join(os.path.expanduser("~/Library/Application Support"), APP_NAME)
+        else:
+            base = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+            path = os.path.join(base, "file_collector")
+    try:
+        os.makedirs(path, exist_ok=True)
+    except OSError as e:
+        logging.error(f"Failed to create config directory {path}: {e}")
+        return os.getcwd()
+    return path
+
+
+def config_path(file_name: str) -> str:
+    path = os.path.join(config_dir(), file_name)
+    if not os.path.exists(path) and os.path.exists(file_name):
+        # Earlier versions kept their files in the working directory
+        try:
+            shutil.copyfile(file_name, path)
+            logging.info(f"Migrated {file_name} to {path}")
+        except OSError as e:
+            logging.error(f"Failed to migrate {file_name}: {e}")
+            return file_name
+    return path
+
+
+def app_dir() -> str:
+    if getattr(sys, "frozen", False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def presets_path() -> Optional[str]:
+    # A user copy wins over the presets shipped next to the application
+    for path in (
+        os.path.join(config_dir(), "presets.json"),
+        os.path.join(app_dir(), "presets.json"),
+        "presets.json",
+    ):
+        if os.path.exists(path):
+            return path
+    return None
+
+INDEX_VERSION = 2
+INDEX_MAGIC = b"FCIX"
+# Magic, version, number of trigrams and the posting format ("H" or "I")
+INDEX_HEADER = struct.Struct("<4sIIc")
+# Trigram (UTF-8, NUL padded), first posting and number of postings
+INDEX_ENTRY = struct.Struct("<12sII")
+REGEX_SPECIAL_CHARS = set(".^$*+?{}[]()|")
+
+
+def extract_trigrams(text: str) -> Set[str]:
+    lowered = text.lower()
+    return {lowered[i:i + 3] for i in range(len(lowered) - 2)}
+
+
+def required_literals(pattern: str) -> List[str]:
+    """Return literal runs that every match of ``pattern`` must contain.
+
+    Only top-level literals outside groups and classes are considered, and a
+    pattern with alternation yields nothing, so the result is always safe to
+    use as a prefilter.
+    """
+    literals = []
+    current = ""
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern):
+            escaped = pattern[i + 1]
+            i += 2
+            if depth == 0 and not escaped.isalnum():
+                current += escaped
+                continue
+        elif char == "[":
+            # Skip the whole character class
+            i += 1
+            if i < len(pattern) and pattern[i] == "^":
+                i += 1
+            if i < len(pattern) and pattern[i] == "]":
+                i += 1
+            while i < len(pattern) and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+            i += 1
+        elif char == "|":
+            return []
+        elif char in "*?{":
+            # The preceding character is optional or repeated
+            current = current[:-1]
+            if char == "{":
+                while i < len(pattern) and pattern[i] != "}":
+                    i += 1
+            i += 1
+        elif char == "(":
+            depth += 1
+            i += 1
+        elif char == ")":
+            depth = max(depth - 1, 0)
+            i += 1
+        elif char in REGEX_SPECIAL_CHARS:
+            i += 1
+        else:
+            i += 1
+            if depth == 0:
+                current += char
+                continue
+        if current:
+            literals.append(current)
+        current = ""
+    if current:
+        literals.append(current)
+    return literals
+
+
+class SearchIndex:
+    """Trigram index over the collected content of one project.
+
+    Every collected file is recorded with the output parts it was written to,
+    so a query only has to read the candidate files back from those parts.
+    The file list is kept in ``{project}_index.json`` and the postings in a
+    binary ``{project}_index.postings`` file with a sorted trigram directory,
+    which is binary searched on disk so loading does not depend on its size.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.postings_path = os.path.splitext(path)[0] + ".postings"
+        self.parts: List[str] = []
+        self.files: List[Dict[str, Any]] = []
+        self.trigram_count = 0
+        self.id_format = "I"
+        # Transform configuration the indexed content was produced with
+        self.transforms = ""
+        self._previous: Dict[str, int] = {}
+        self._previous_files: List[Dict[str, Any]] = []
+        self._reused: Dict[int, int] = {}
+        self._new_postings: Dict[str, List[int]] = {}
+
+    def load(self) -> bool:
+        if not os.path.exists(self.path) or not os.path.exists(self.postings_path):
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            with open(self.postings_path, "rb") as f:
+                magic, version, trigram_count, id_format = INDEX_HEADER.unpack(
+                    f.read(INDEX_HEADER.size)
+                )
+        except (IOError, json.JSONDecodeError, struct.error) as e:
+            logging.warning(f"Failed to load search index {self.path}: {e}")
+            return False
+        if data.get("version") != INDEX_VERSION or magic != INDEX_MAGIC or version != INDEX_VERSION:
+            return False
+        self.parts = data.get("parts", [])
+        self.files = data.get("files", [])
+        self.transforms = data.get("transforms", "")
+        self.trigram_count = trigram_count
+        self.id_format = id_format.decode("ascii")
+        return True
+
+    def save(self, postings: Dict[str, List[int]]) -> None:
+        entries = sorted(
+            (trigram.encode("utf-8", errors="surrogatepass").ljust(12, b"\0"), ids)
+            for trigram, ids in postings.items()
+        )
+        # Two-byte file ids halve the postings of all but the largest projects
+        id_format = "H" if len(self.files) <= 0xFFFF else "I"
+        tmp_path = self.postings_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(entries), id_format.encode("ascii")))
+            first = 0
+            for key, ids in entries:
+                f.write(INDEX_ENTRY.pack(key, first, len(ids)))
+                first += len(ids)
+            for _, ids in entries:
+                f.write(struct.pack(f"<{len(ids)}{id_format}", *ids))
+        os.replace(tmp_path, self.postings_path)
+        self.trigram_count = len(entries)
+        self.id_format = id_format
+
+        # The file list is replaced last, so its mtime marks a complete index
+        data = {
+            "version": INDEX_VERSION,
+            "parts": self.parts,
+            "files": self.files,
+            "transforms": self.transforms,
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def lookup(self, f, trigram: str) -> List[int]:
+        """Binary search the trigram directory of the open postings file ``f``."""
+        key = trigram.encode("utf-8", errors="surrogatepass")
+        if len(key) > 12:
+            return []
+        key = key.ljust(12, b"\0")
+        low, high = 0, self.trigram_count
+        while low < high:
+            middle = (low + high) // 2
+            f.seek(INDEX_HEADER.size + middle * INDEX_ENTRY.size)
+            entry_key, first, count = INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size))
+            if entry_key < key:
+                low = middle + 1
+            elif entry_key > key:
+                high = middle
+            else:
+                id_size = struct.calcsize(self.id_format)
+                f.seek(INDEX_HEADER.size + self.trigram_count * INDEX_ENTRY.size + first * id_size)
+                return list(struct.unpack(f"<{count}{self.id_format}", f.read(count * id_size)))
+        return []
+
+    def iter_postings(self):
+        """Yield ``(trigram, ids)`` for every trigram in the postings file."""
+        id_size = struct.calcsize(self.id_format)
+        with open(self.postings_path, "rb") as f:
+            f.seek(INDEX_HEADER.size)
+            directory = f.read(self.trigram_count * INDEX_ENTRY.size)
+            for key, first, count in INDEX_ENTRY.iter_unpack(directory):
+                # Padding decodes to NULs; every trigram is exactly three characters
+                yield key.decode("utf-8", errors="surrogatepass")[:3], struct.unpack(
+                    f"<{count}{self.id_format}", f.read(count * id_size)
+                )
+
+    def begin_update(self, transforms: str = "", keep_parts: bool = False) -> None:
+        # Keep the previous run around so unchanged files reuse their trigrams,
+        # unless the transforms that produced the indexed content changed
+        if transforms == self.transforms:
+            self._previous_files = self.files
+            self._previous = {entry["path"]: i for i, entry in enumerate(self.files)}
+        else:
+            self._previous_files = []
+            self._previous = {}
+        self.transforms = transforms
+        self._reused = {}
+        self._new_postings = {}
+        if not keep_parts:
+            self.parts = []
+        self.files = []
+
+    def carry_over(self, skip: Set[str]) -> None:
+        """Keep the previous entries of all files outside ``skip`` as they are.
+
+        Delta runs only write what changed, so everything else stays where the
+        earlier parts put it.
+        """
+        for previous_id, entry in enumerate(self._previous_files):
+            if entry["path"] not in skip:
+                self._reused[previous_id] = len(self.files)
+                self.files.append(entry)
+
+    def add_part(self, part_path: str) -> None:
+        self.parts.append(os.path.basename(part_path))
+
+    def add_file(
+        self,
+        file_path: str,
+        mtime: float,
+        size: int,
+        segments: List[List[int]],
+        data: bytes,
+    ) -> None:
+        file_id = len(self.files)
+        self.files.append({
+            "path": file_path,
+            "mtime": mtime,
+            "size": size,
+            "segments": segments,
+        })
+        previous_id = self._previous.get(file_path)
+        if previous_id is not None:
+            previous = self._previous_files[previous_id]
+            if previous["mtime"] == mtime and previous["size"] == size:
+                self._reused[previous_id] = file_id
+                return
+        for trigram in extract_trigrams(data.decode("utf-8", errors="ignore")):
+            self._new_postings.setdefault(trigram, []).append(file_id)
+
+    def finish_update(self) -> None:
+        postings: Dict[str, List[int]] = {}
+        if self._reused:
+            for trigram, ids in self.iter_postings():
+                # Carried over files may be renumbered out of order
+                kept = sorted(self._reused[i] for i in ids if i in self._reused)
+                if kept:
+                    postings[trigram] = kept
+        for trigram, ids in self._new_postings.items():
+            postings[trigram] = sorted(postings.get(trigram, []) + ids)
+        self._previous = {}
+        self._previous_files = []
+        self._reused = {}
+        self._new_postings = {}
+        self.save(postings)
+
+    def candidates(self, literals: List[str]) -> List[int]:
+        result: Optional[Set[int]] = None
+        with open(self.postings_path, "rb") as f:
+            for literal in literals:
+                for trigram in extract_trigrams(literal):
+                    ids = set(self.lookup(f, trigram))
+                    result = ids if result is None else result & ids
+                    if not result:
+                        return []
+        if result is None:
+            return list(range(len(self.files)))
+        return sorted(result)
+
+    def read_lines(self, file_id: int):
+        """Yield ``(line_number, part_name, offset, text)`` for a collected file."""
+        output_folder = os.path.dirname(self.path)
+        chunks = []
+        positions = []
+        for part_index, offset, length in self.files[file_id]["segments"]:
+            part_path = os.path.join(output_folder, self.parts[part_index])
+            with open(part_path, "rb") as f:
+                f.seek(offset)
+                chunks.append(f.read(length))
+            positions.append((part_index, offset, length))
+        data = b"".join(chunks)
+
+        def locate(position: int) -> Tuple[str, int]:
+            for part_index, offset, length in positions:
+                if position < length:
+                    return self.parts[part_index], offset + position
+                position -= length
+            part_index, offset, length = positions[-1]
+            return self.parts[part_index], offset + length
+
+        start = 0
+        # Line 0 is the "File: ..." header written in front of the content
+        for line_number, raw_line in enumerate(data.split(b"\n")):
+            if line_number > 0:
+                part_name, offset = locate(start)
+                text = raw_line.rstrip(b"\r").decode("utf-8", errors="replace")
+                yield line_number, part_name, offset, text
+            start += len(raw_line) + 1
+
+    def search(
+        self,
+        query: str,
+        regex: bool = False,
+        ignore_case: bool = False,
+        limit: int = 200,
+    ) -> List[Dict[str, Any]]:
+        if regex:
+            pattern = re.compile(query, re.IGNORECASE if ignore_case else 0)
+            literals = required_literals(query)
+            matches = lambda line: pattern.search(line) is not None
+        else:
+            literals = [query]
+            needle = query.lower() if ignore_case else query
+            if ignore_case:
+                matches = lambda line: needle in line.lower()
+            else:
+                matches = lambda line: needle in line
+
+        results = []
+        for file_id in self.candidates(literals):
+            try:
+                for line_number, part_name, offset, text in self.read_lines(file_id):
+                    if matches(text):
+                        results.append({
+                            "path": self.files[file_id]["path"],
+                            "line": line_number,
+                            "part": part_name,
+                            "offset": offset,
+                            "text": text,
+                        })
+                        if len(results) >= limit:
+                            return results
+            except (IOError, IndexError) as e:
+                logging.warning(f"Failed to read indexed content: {e}")
+        return results
+
+
+PACKING_WINDOW = 16
+
+
+class OutputWriter:
+    """Writes collected files into ``{prefix}_N.txt`` parts of at most ``max_file_size_kb``."""
+
+    def __init__(
+        self,
+        output_folder_path: str,
+        prefix: str,
+        max_file_size_kb: float,
+        search_index: Optional[SearchIndex] = None,
+    ) -> None:
+        self.output_folder_path = output_folder_path
+        self.prefix = prefix
+        self.part_limit = int(max_file_size_kb * 1024)
+        self.search_index = search_index
+        self.paths: List[str] = []
+        self.output_file = None
+        self.collected_size = 0
+        self.total_bytes = 0
+
+    def open(self) -> None:
+        output_file_path = os.path.join(
+            self.output_folder_path, f"{self.prefix}_{len(self.paths) + 1}.txt"
+        )
+        self.output_file = open(output_file_path, "w", encoding="utf-8")
+        self.paths.append(output_file_path)
+        if self.search_index:
+            self.search_index.add_part(output_file_path)
+        self.collected_size = 0
+
+    def start_new_part(self) -> None:
+        # Never leave an empty part behind
+        if self.collected_size > 0:
+            self.output_file.close()
+            self.open()
+
+    def write(self, content: str, header: str) -> List[List[int]]:
+        """Write one file and return the ``[part, offset, length]`` segments it occupies."""
+        return self.write_bytes(f"{header}{content}\n\n".encode("utf-8"))
+
+    def write_bytes(self, total_content_bytes: bytes) -> List[List[int]]:
+        total_length = len(total_content_bytes)
+        segments = []
+        start = 0
+        while start < total_length:
+            if self.collected_size >= self.part_limit:
+                self.output_file.close()
+                self.open()
+
+            end = start + self.part_limit - self.collected_size
+            chunk_bytes = total_content_bytes[start:end]
+            chunk = chunk_bytes.decode("utf-8", errors="ignore")
+            if self.search_index:
+                # tell() gives real byte offsets, including newline translation
+                offset = self.output_file.tell()
+                self.output_file.write(chunk)
+                # Parts are numbered across the index, which a delta run extends
+                part_index = len(self.search_index.parts) - 1
+                segments.append([part_index, offset, self.output_file.tell() - offset])
+            else:
+                self.output_file.write(chunk)
+            self.collected_size += len(chunk_bytes)
+            self.total_bytes += len(chunk_bytes)
+            start = end
+        return segments
+
+    def write_marker(self, text: str) -> None:
+        # Appended to the current part regardless of the size limit
+        self.output_file.write(text)
+
+    def close(self) -> None:
+        if self.output_file and not self.output_file.closed:
+            self.output_file.close()
+
+
+class CollectionError(Exception):
+    pass
+
+
+def run_git(folder: str, args: List[str]) -> Optional[List[str]]:
+    """Run a local git command in ``folder`` and return its NUL-separated output."""
+    import subprocess
+    try:
+        result = subprocess.run(
+            ["git", "-C", folder] + args,
+            capture_output=True,
+            check=True,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        logging.warning(f"git {' '.join(args)} failed in {folder}: {e}")
+        return None
+    return [p for p in result.stdout.decode("utf-8", errors="surrogateescape").split("\0") if p]
+
+
+def list_git_files(folder: str, changed_since: str = "") -> Optional[List[str]]:
+    """List files below ``folder`` from the git index, honouring .gitignore.
+
+    With ``changed_since`` only files that differ from that ref in the working
+    tree, plus untracked files, are returned. Returns None if ``folder`` is not
+    inside a git work tree and raises CollectionError if ``changed_since`` is
+    not a commit there.
+    """
+    inside = run_git(folder, ["rev-parse", "--is-inside-work-tree"])
+    if not inside or inside[0].strip() != "true":
+        return None
+    if changed_since:
+        if changed_since.startswith("-") or run_git(
+            folder, ["rev-parse", "--verify", "--quiet", f"{changed_since}^{{commit}}"]
+        ) is None:
+            raise CollectionError(f"'{changed_since}' is not a valid git ref in {folder}")
+        changed = run_git(
+            folder, ["diff", "--name-only", "-z", "--relative", "--diff-filter=d", changed_since, "--"]
+        )
+        untracked = run_git(folder, ["ls-files", "-z", "--others", "--exclude-standard"])
+        if changed is None or untracked is None:
+            raise CollectionError(f"Failed to list files changed since '{changed_since}' in {folder}")
+        relative_paths = changed + untracked
+    else:
+        relative_paths = run_git(
+            folder, ["ls-files", "-z", "--cached", "--others", "--exclude-standard"]
+        )
+        # The index still lists files deleted from the working tree
+        deleted = run_git(folder, ["ls-files", "-z", "--deleted"])
+        if relative_paths is None or deleted is None:
+            return None
+        if deleted:
+            deleted_paths = set(deleted)
+            relative_paths = [p for p in relative_paths if p not in deleted_paths]
+    return [os.path.join(folder, os.path.normpath(path)) for path in relative_paths]
+
+
+# Marker files that identify the ecosystem of the directory they live in
+PROJECT_MARKERS = {
+    "package.json": "Node.js",
+    "pyproject.toml": "Python",
+    "setup.py": "Python",
+    "setup.cfg": "Python",
+    "requirements.txt": "Python",
+    "Pipfile": "Python",
+    "pom.xml": "Java",
+    "build.gradle": "Java",
+    "build.gradle.kts": "Kotlin",
+    "Cargo.toml": "Rust",
+    "go.mod": "Go",
+    "Gemfile": "Ruby",
+    "composer.json": "PHP",
+    "CMakeLists.txt": "C++",
+    "Package.swift": "Swift",
+    "Podfile": "iOS",
+    "AndroidManifest.xml": "Android",
+}
+PROJECT_MARKER_EXTENSIONS = {
+    ".csproj": "C#",
+    ".sln": "C#",
+}
+
+
+# Entries looked at when measuring one pruned directory for the report
+PRUNE_MEASURE_ENTRIES = 1000
+
+
+def split_preset_value(value: str) -> Set[str]:
+    return {x.strip() for x in value.split(",") if x.strip()}
+
+
+class ProjectDetector:
+    """Detects ecosystems per directory and scopes matching preset rules to that subtree.
+
+    Directories pruned by a detected preset are only measured when report()
+    is asked for, breadth first up to ``PRUNE_MEASURE_ENTRIES`` entries, so the
+    saved entries and bytes are a lower bound for large trees. Measurements
+    are cached by the directory's mtime.
+    """
+
+    def __init__(self, presets: Dict[str, Dict[str, str]], cache_path: Optional[str] = None) -> None:
+        self.presets = presets
+        self.cache_path = cache_path
+        self.detected: Dict[str, List[str]] = {}
+        self.pruned: List[str] = []
+        self.sizes: Dict[str, Dict[str, Any]] = {}
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    self.sizes = json.load(f)
+            except (IOError, json.JSONDecodeError) as e:
+                logging.warning(f"Failed to load prune cache {cache_path}: {e}")
+
+    def detect(self, directory: str, files: List[str]) -> List[str]:
+        if directory not in self.detected:
+            ecosystems = []
+            for file in files:
+                ecosystem = PROJECT_MARKERS.get(file) or PROJECT_MARKER_EXTENSIONS.get(
+                    os.path.splitext(file)[1]
+                )
+                if ecosystem and ecosystem in self.presets and ecosystem not in ecosystems:
+                    ecosystems.append(ecosystem)
+            self.detected[directory] = ecosystems
+        return self.detected[directory]
+
+    def apply(self, directory: str, files: List[str], rules: Dict[str, Any]) -> Dict[str, Any]:
+        """Return ``rules`` extended with the presets detected in ``directory``."""
+        new_presets = [p for p in self.detect(directory, files) if p not in rules["presets"]]
+        if not new_presets:
+            return rules
+        scoped = {
+            "folders": set(rules["folders"]),
+            "filetypes": set(rules["filetypes"]),
+            "filenames": set(rules["filenames"]),
+            "presets": rules["presets"] | set(new_presets),
+        }
+        for preset_name in new_presets:
+            preset = self.presets[preset_name]
+            scoped["folders"] |= split_preset_value(preset.get("ignore_folders", ""))
+            scoped["filetypes"] |= split_preset_value(preset.get("ignore_filetypes", ""))
+            scoped["filenames"] |= split_preset_value(preset.get("ignore_filenames", ""))
+        return scoped
+
+    def record_pruned(self, path: str) -> None:
+        self.pruned.append(path)
+
+    def measure(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+        cached = self.sizes.get(path)
+        if not cached or cached["mtime"] != mtime:
+            entries = 0
+            size = 0
+            queue = deque([path])
+            # Pruning is meant to avoid this I/O, so only a bounded sample is measured
+            while queue and entries < PRUNE_MEASURE_ENTRIES:
+                try:
+                    with os.scandir(queue.popleft()) as it:
+                        for entry in it:
+                            entries += 1
+                            if entry.is_dir(follow_symlinks=False):
+                                queue.append(entry.path)
+                            elif entry.is_file(follow_symlinks=False):
+                                size += entry.stat(follow_symlinks=False).st_size
+                            if entries >= PRUNE_MEASURE_ENTRIES:
+                                break
+                except OSError:
+                    continue
+            complete = entries < PRUNE_MEASURE_ENTRIES and not queue
+            cached = {"mtime": mtime, "entries": entries, "bytes": size, "complete": complete}
+            self.sizes[path] = cached
+        return cached
+
+    def report(self) -> Dict[str, Any]:
+        pruned = []
+        for path in self.pruned:
+            measured = self.measure(path)
+            if measured:
+                pruned.append({
+                    "path": path,
+                    "entries": measured["entries"],
+                    "bytes": measured["bytes"],
+                    "complete": measured.get("complete", True),
+                })
+        return {
+            "detected": {d: e for d, e in self.detected.items() if e},
+            "pruned": pruned,
+            "entries": sum(p["entries"] for p in pruned),
+            "bytes": sum(p["bytes"] for p in pruned),
+            "complete": all(p["complete"] for p in pruned),
+        }
+
+    def save(self) -> None:
+        if not self.cache_path:
+            return
+        # Only keep directories that were pruned in this run
+        pruned_paths = set(self.pruned)
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(self.cache_path, "w", encoding="utf-8") as f:
+                json.dump({k: v for k, v in self.sizes.items() if k in pruned_paths}, f)
+        except IOError as e:
+            logging.warning(f"Failed to save prune cache {self.cache_path}: {e}")
+
+
+def format_prune_report(report: Dict[str, Any]) -> str:
+    if not report["detected"]:
+        return "Auto-detect: no known project types found."
+    ecosystems = sorted({e for names in report["detected"].values() for e in names})
+    at_least = "" if report["complete"] else "at least "
+    return (
+        f"Auto-detect: {', '.join(ecosystems)} in {len(report['detected'])} folder(s); "
+        f"pruned {len(report['pruned'])} folder(s), {at_least}{report['entries']} entries, "
+        f"{report['bytes'] / (1024 * 1024):.1f} MB"
+    )
+
+
+def iter_project_files(
+    folders: List[str],
+    ignore_folders: Set[str],
+    ignore_filetypes: Set[str],
+    ignore_filenames: Set[str],
+    output_folder_path: str,
+    use_git: bool = False,
+    changed_since: str = "",
+    detector: Optional[ProjectDetector] = None,
+):
+    base_rules = {
+        "folders": ignore_folders,
+        "filetypes": ignore_filetypes,
+        "filenames": ignore_filenames,
+        "presets": frozenset(),
+    }
+    for root_folder in folders:
+        git_files = list_git_files(root_folder, changed_since) if use_git else None
+        if git_files is not None:
+            for file_path in git_files:
+                relative_dirs = os.path.relpath(os.path.dirname(file_path), root_folder)
+                if any(part in ignore_folders for part in relative_dirs.split(os.sep)):
+                    continue
+                file = os.path.basename(file_path)
+                if (file in ignore_filenames) or (os.path.splitext(file)[1] in ignore_filetypes):
+                    continue
+                if file_path.startswith(output_folder_path):
+                    continue
+                yield file_path
+            continue
+        if use_git:
+            logging.warning(f"{root_folder} is not a git work tree, walking it instead")
+
+        # Rules scoped to subtrees by auto-detected presets, keyed by directory
+        scoped_rules: Dict[str, Dict[str, Any]] = {}
+        for root, dirs, files in os.walk(root_folder):
+            rules = scoped_rules.pop(root, base_rules)
+            if detector:
+                rules = detector.apply(root, files, rules)
+            kept_dirs = []
+            for d in dirs:
+                dir_path = os.path.join(root, d)
+                # Skip the output folder to prevent os.walk() from traversing it
+                if dir_path == output_folder_path or d in ignore_folders:
+                    continue
+                if d in rules["folders"]:
+                    if detector:
+                        detector.record_pruned(dir_path)
+                    continue
+                kept_dirs.append(d)
+                if rules is not base_rules:
+                    scoped_rules[dir_path] = rules
+            dirs[:] = kept_dirs
+            for file in files:
+                file_path = os.path.join(root, file)
+                file_ext = os.path.splitext(file)[1]
+                if (file in rules["filenames"]) or (file_ext in rules["filetypes"]):
+                    continue
+                if file_path.startswith(output_folder_path):
+                    continue
+                yield file_path
+
+
+# Bytes checked for UTF-8 before a file is given space in a packed layout
+TEXT_SNIFF_BYTES = 8 * 1024
+
+
+def is_text_file(file_path: str) -> bool:
+    """Cheap check, from the first few KB, that a file will decode as UTF-8."""
+    try:
+        with open(file_path, "rb") as f:
+            chunk = f.read(TEXT_SNIFF_BYTES)
+        # final=False tolerates a character cut at the end of the chunk
+        codecs.getincrementaldecoder("utf-8")().decode(chunk, final=False)
+    except (OSError, UnicodeDecodeError):
+        return False
+    return True
+
+
+def stat_file_sizes(file_paths) -> List[Tuple[str, int]]:
+    entries = []
+    for file_path in file_paths:
+        try:
+            size = os.path.getsize(file_path)
+        except OSError as e:
+            logging.warning(f"Failed to stat {file_path}: {e}")
+            continue
+        # Account for the "File: ..." header and the blank line after the content
+        entries.append((file_path, size + len(f"File: {file_path}\n".encode("utf-8")) + 2))
+    return entries
+
+
+def plan_packed_layout(entries: List[Tuple[str, int]], part_limit: int) -> List[List[str]]:
+    """Group files into parts so that only files larger than a part get split.
+
+    Files are packed directory by directory in walk order. A directory that fits
+    in one of the last few open parts is kept together; otherwise its files are
+    placed largest first. Only the most recent ``PACKING_WINDOW`` parts stay open,
+    which keeps neighbouring files close together and the packing linear.
+    """
+    parts: List[Dict[str, Any]] = []
+    window: List[Dict[str, Any]] = []
+
+    def new_part(free: int) -> Dict[str, Any]:
+        part = {"files": [], "free": free}
+        parts.append(part)
+        window.append(part)
+        if len(window) > PACKING_WINDOW:
+            window.pop(0)
+        return part
+
+    def place(files: List[str], size: int) -> None:
+        for part in window:
+            if part["free"] >= size:
+                break
+        else:
+            if size > part_limit:
+                # Oversized files start on a fresh part and spill into the
+                # following ones; only the space left in the last part is reusable
+                part = new_part(-size % part_limit)
+                part["files"].extend(files)
+                return
+            part = new_part(part_limit)
+        part["files"].extend(files)
+        part["free"] -= size
+
+    groups: Dict[str, List[Tuple[str, int]]] = {}
+    for file_path, size in entries:
+        groups.setdefault(os.path.dirname(file_path), []).append((file_path, size))
+
+    for group in groups.values():
+        group_size = sum(size for _, size in group)
+        if group_size <= part_limit:
+            place([file_path for file_path, _ in group], group_size)
+        else:
+            for file_path, size in sorted(group, key=lambda entry: entry[1], reverse=True):
+                place([file_path], size)
+
+    return [part["files"] for part in parts]
+
+
+# Full-line and block comment syntax per file extension
+LINE_COMMENTS = {
+    ".py": "#", ".sh": "#", ".rb": "#", ".pl": "#", ".r": "#", ".yaml": "#", ".yml": "#",
+    ".toml": "#", ".cfg": "#", ".ini": ";", ".js": "//", ".jsx": "//", ".ts": "//",
+    ".tsx": "//", ".java": "//", ".kt": "//", ".swift": "//", ".go": "//", ".rs": "//",
+    ".c": "//", ".h": "//", ".cpp": "//", ".hpp": "//", ".cc": "//", ".cs": "//",
+    ".php": "//", ".scss": "//", ".sql": "--", ".lua": "--",
+}
+BLOCK_COMMENTS = {
+    ".js": ("/*", "*/"), ".jsx": ("/*", "*/"), ".ts": ("/*", "*/"), ".tsx": ("/*", "*/"),
+    ".java": ("/*", "*/"), ".kt": ("/*", "*/"), ".swift": ("/*", "*/"), ".go": ("/*", "*/"),
+    ".rs": ("/*", "*/"), ".c": ("/*", "*/"), ".h": ("/*", "*/"), ".cpp": ("/*", "*/"),
+    ".hpp": ("/*", "*/"), ".cc": ("/*", "*/"), ".cs": ("/*", "*/"), ".php": ("/*", "*/"),
+    ".css": ("/*", "*/"), ".scss": ("/*", "*/"), ".sql": ("/*", "*/"),
+    ".html": ("<!--", "-->"), ".xml": ("<!--", "-->"), ".vue": ("<!--", "-->"), ".md": ("<!--", "-->"),
+}
+LICENSE_MARKERS = ("license", "copyright", "spdx-license-identifier")
+DEFAULT_TRANSFORM_OPTIONS = {
+    "truncate_head_lines": 200,
+    "truncate_tail_lines": 50,
+}
+# Transforming small files is cheaper than a cache lookup
+TRANSFORM_CACHE_MIN_BYTES = 16 * 1024
+# Allowance for coarse file system timestamps when expiring cache entries
+TRANSFORM_CACHE_MTIME_SLACK = 2
+
+
+def strip_trailing_whitespace(content: str, file_ext: str, options: Dict[str, Any]) -> str:
+    return "\n".join(line.rstrip() for line in content.split("\n"))
+
+
+def collapse_blank_lines(content: str, file_ext: str, options: Dict[str, Any]) -> str:
+    return re.sub(r"\n(?:[ \t]*\n){2,}", "\n\n", content)
+
+
+def strip_comments(content: str, file_ext: str, options: Dict[str, Any]) -> str:
+    # Only whole-line comments are removed, so code containing comment markers
+    # inside strings is left alone
+    line_marker = LINE_COMMENTS.get(file_ext)
+    block = BLOCK_COMMENTS.get(file_ext)
+    if not line_marker and not block:
+        return content
+    kept = []
+    in_block = False
+    for line in content.split("\n"):
+        stripped = line.strip()
+        if in_block:
+            if block[1] in stripped:
+                in_block = False
+                remainder = stripped.split(block[1], 1)[1].strip()
+                if remainder:
+                    kept.append(remainder)
+            continue
+        if block and stripped.startswith(block[0]):
+            if block[1] not in stripped[len(block[0]):]:
+                in_block = True
+                continue
+            remainder = stripped[len(block[0]):].split(block[1], 1)[1].strip()
+            if remainder:
+                kept.append(line)
+            continue
+        if line_marker and stripped.startswith(line_marker) and not stripped.startswith("#!"):
+            continue
+        kept.append(line)
+    return "\n".join(kept)
+
+
+def strip_license_header(content: str, file_ext: str, options: Dict[str, Any]) -> str:
+    lines = content.split("\n")
+    start = 1 if lines and lines[0].startswith("#!") else 0
+    end = start
+    line_marker = LINE_COMMENTS.get(file_ext)
+    block = BLOCK_COMMENTS.get(file_ext)
+    if block and end < len(lines) and lines[end].strip().startswith(block[0]):
+        while end < len(lines) and block[1] not in lines[end]:
+            end += 1
+        end += 1
+    elif line_marker:
+        while end < len(lines) and lines[end].strip().startswith(line_marker):
+            end += 1
+    header = "\n".join(lines[start:end]).lower()
+    if end > start and any(marker in header for marker in LICENSE_MARKERS):
+        while end < len(lines) and not lines[end].strip():
+            end += 1
+        return "\n".join(lines[:start] + lines[end:])
+    return content
+
+
+def truncate_large(content: str, file_ext: str, options: Dict[str, Any]) -> str:
+    head = int(options.get("truncate_head_lines", 200))
+    tail = int(options.get("truncate_tail_lines", 50))
+    lines = content.split("\n")
+    if len(lines) <= head + tail:
+        return content
+    elided = len(lines) - head - tail
+    marker = f"... [{elided} lines elided] ..."
+    return "\n".join(lines[:head] + [marker] + (lines[-tail:] if tail else []))
+
+
+TRANSFORMS = {
+    "strip_trailing_whitespace": strip_trailing_whitespace,
+    "collapse_blank_lines": collapse_blank_lines,
+    "strip_comments": strip_comments,
+    "strip_license_header": strip_license_header,
+    "truncate": truncate_large,
+}
+
+
+def parse_extension_transforms(text: str) -> Dict[str, List[str]]:
+    """Parse ``.js=strip_comments+truncate; .md=collapse_blank_lines``."""
+    result = {}
+    for item in text.split(";"):
+        if "=" not in item:
+            continue
+        extensions, names = item.split("=", 1)
+        transforms = [name.strip() for name in names.split("+") if name.strip()]
+        for ext in extensions.split(","):
+            if ext.strip():
+                result[ext.strip()] = transforms
+    return result
+
+
+def format_extension_transforms(extension_transforms: Dict[str, List[str]]) -> str:
+    return "; ".join(
+        f"{ext}={'+'.join(names)}" for ext, names in sorted(extension_transforms.items())
+    )
+
+
+class ContentTransformer:
+    """Applies a project's configured transforms, caching results by content hash."""
+
+    def __init__(self, project: Dict[str, Any], cache_dir: Optional[str] = None) -> None:
+        self.default = self._known(project.get("transforms", []))
+        self.by_extension = {
+            ext: self._known(names)
+            for ext, names in project.get("extension_transforms", {}).items()
+        }
+        self.options = dict(DEFAULT_TRANSFORM_OPTIONS, **project.get("transform_options", {}))
+        self.cache_dir = cache_dir
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @staticmethod
+    def _known(names: List[str]) -> List[str]:
+        known = []
+        for name in names:
+            if name in TRANSFORMS:
+                known.append(name)
+            else:
+                logging.warning(f"Unknown transform '{name}' ignored")
+        return known
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies the configuration, for caches of transformed content."""
+        return json.dumps([self.default, self.by_extension, self.options], sort_keys=True)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.default or any(self.by_extension.values()))
+
+    def transforms_for(self, file_path: str) -> List[str]:
+        file_ext = os.path.splitext(file_path)[1]
+        return self.by_extension.get(file_ext, self.default)
+
+    def apply(self, content: str, file_path: str) -> str:
+        names = self.transforms_for(file_path)
+        if not names:
+            return content
+        file_ext = os.path.splitext(file_path)[1].lower()
+
+        cache_path = None
+        if self.cache_dir and len(content) >= TRANSFORM_CACHE_MIN_BYTES:
+            config = json.dumps([file_ext, names, self.options], sort_keys=True)
+            digest = hashlib.sha256(config.encode("utf-8"))
+            digest.update(content.encode("utf-8", errors="surrogatepass"))
+            key = digest.hexdigest()
+            cache_path = os.path.join(self.cache_dir, key[:2], key)
+            try:
+                with open(cache_path, "r", encoding="utf-8", newline="") as f:
+                    content = f.read()
+                self.cache_hits += 1
+                # The mtime marks when an entry was last used, for collect_garbage()
+                os.utime(cache_path)
+                return content
+            except FileNotFoundError:
+                self.cache_misses += 1
+            except (IOError, UnicodeDecodeError) as e:
+                logging.warning(f"Failed to read transform cache {cache_path}: {e}")
+
+        for name in names:
+            content = TRANSFORMS[name](content, file_ext, self.options)
+
+        if cache_path:
+            try:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+                    f.write(content)
+                os.replace(tmp_path, cache_path)
+            except IOError as e:
+                logging.warning(f"Failed to write transform cache {cache_path}: {e}")
+        return content
+
+    def collect_garbage(self, since: float) -> None:
+        """Remove cache entries that were not used since ``since``.
+
+        Called after a complete full run, when every file has been through
+        apply(), so whatever is older belongs to edited files or old settings.
+        """
+        if not self.cache_dir or not os.path.isdir(self.cache_dir):
+            return
+        for root, _, files in os.walk(self.cache_dir):
+            for file in files:
+                path = os.path.join(root, file)
+                try:
+                    if os.path.getmtime(path) < since:
+                        os.remove(path)
+                except OSError:
+                    pass
+
+
+# Files per batch shipped to a worker process
+WORKER_BATCH_SIZE = 64
+
+
+def read_file_content(file_path: str, transformer: ContentTransformer) -> Tuple[bytes, float, int]:
+    """Read, decode and transform one file, returning ``(utf-8 data, mtime, size)``."""
+    with open(file_path, "r", encoding="utf-8") as f:
+        stat = os.fstat(f.fileno())
+        content = f.read()
+    content = transformer.apply(content, file_path)
+    return content.encode("utf-8"), stat.st_mtime, stat.st_size
+
+
+def read_file_with_timeout(
+    file_path: str, transformer: ContentTransformer, timeout: float = 0
+) -> Tuple[bytes, float, int]:
+    """Like read_file_content(), but give up after ``timeout`` seconds.
+
+    A read stuck on a stale network or FUSE mount cannot be interrupted, so it
+    is left behind in a daemon thread and the file is reported as timed out.
+    """
+    if not timeout:
+        return read_file_content(file_path, transformer)
+    result = {}
+
+    def target():
+        try:
+            result["value"] = read_file_content(file_path, transformer)
+        except Exception as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise TimeoutError(f"read timed out after {timeout} seconds")
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
+
+
+def process_file_batch(
+    file_paths: List[str],
+    transformer: ContentTransformer,
+    use_shared_memory: bool,
+    read_timeout: float = 0,
+):
+    """Worker entry point: read a batch of files and pack their contents together.
+
+    Contents are returned in one shared memory block when available so they are
+    not pickled through the result pipe. Windows destroys a block as soon as its
+    last handle closes, so there the packed bytes are returned directly.
+    """
+    chunks = []
+    entries = []
+    offset = 0
+    # The transformer arrives with the parent's running totals; only report
+    # what this batch added
+    hits, misses = transformer.cache_hits, transformer.cache_misses
+    for file_path in file_paths:
+        try:
+            data, mtime, size = read_file_with_timeout(file_path, transformer, read_timeout)
+        except Exception as e:
+            entries.append((file_path, e))
+            continue
+        chunks.append(data)
+        entries.append((file_path, (offset, len(data), mtime, size)))
+        offset += len(data)
+    payload = b"".join(chunks)
+    cache_counts = (transformer.cache_hits - hits, transformer.cache_misses - misses)
+    if not use_shared_memory or not payload:
+        return None, payload, entries, cache_counts
+
+    from multiprocessing import shared_memory
+    try:
+        block = shared_memory.SharedMemory(create=True, size=len(payload), track=False)
+    except TypeError:
+        # Before Python 3.13 the block is tracked by this worker, but the
+        # parent owns and unlinks it
+        from multiprocessing import resource_tracker
+        block = shared_memory.SharedMemory(create=True, size=len(payload))
+        resource_tracker.unregister(block._name, "shared_memory")
+    block.buf[:len(payload)] = payload
+    name = block.name
+    block.close()
+    return name, None, entries, cache_counts
+
+
+def unpack_file_batch(result):
+    name, payload, entries = result[:3]
+    if name is not None:
+        from multiprocessing import shared_memory
+        block = shared_memory.SharedMemory(name=name)
+        try:
+            payload = bytes(block.buf)
+        finally:
+            block.close()
+            block.unlink()
+    for file_path, entry in entries:
+        if isinstance(entry, Exception):
+            yield file_path, entry
+        else:
+            offset, length, mtime, size = entry
+            yield file_path, (payload[offset:offset + length], mtime, size)
+
+
+def read_layout(
+    layout, transformer: ContentTransformer, workers: int = 0, read_timeout: float = 0
+):
+    """Yield ``(file_path, starts_part, result)`` in layout order.
+
+    ``result`` is ``(data, mtime, size)`` or the exception raised while
+    reading. With ``workers``
+    set, batches of paths are read by a process pool while the caller writes,
+    and results are still yielded in their original order.
+    """
+    def flatten():
+        for part_files in layout:
+            starts_part = True
+            for file_path in part_files:
+                yield file_path, starts_part
+                starts_part = False
+
+    if workers <= 0:
+        for file_path, starts_part in flatten():
+            try:
+                result = read_file_with_timeout(file_path, transformer, read_timeout)
+            except Exception as e:
+                result = e
+            yield file_path, starts_part, result
+        return
+
+    def batches():
+        batch = []
+        for item in flatten():
+            batch.append(item)
+            if len(batch) >= WORKER_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def drain(batch, future):
+        batch_result = future.result()
+        # Workers transform with their own copy, so add up their cache counts here
+        transformer.cache_hits += batch_result[3][0]
+        transformer.cache_misses += batch_result[3][1]
+        for (file_path, starts_part), (_, result) in zip(batch, unpack_file_batch(batch_result)):
+            yield file_path, starts_part, result
+
+    import concurrent.futures
+    use_shared_memory = os.name != "nt"
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        try:
+            for batch in batches():
+                future = executor.submit(
+                    process_file_batch,
+                    [p for p, _ in batch],
+                    transformer,
+                    use_shared_memory,
+                    read_timeout,
+                )
+                pending.append((batch, future))
+                # Keep a couple of batches per worker in flight to bound memory
+                while len(pending) >= workers * 2:
+                    yield from drain(*pending.popleft())
+            while pending:
+                yield from drain(*pending.popleft())
+        finally:
+            # Release the shared memory of batches that were never consumed
+            for _, future in pending:
+                if not future.cancel():
+                    try:
+                        for _ in unpack_file_batch(future.result()):
+                            pass
+                    except Exception as e:
+                        logging.warning(f"Failed to release worker batch: {e}")
+
+
+class RunBudget:
+    """Limits for a single collection run; a value of 0 means unlimited."""
+
+    def __init__(self, project: Dict[str, Any]) -> None:
+        self.max_output_bytes = int(project.get("max_output_kb", 0) * 1024)
+        self.max_files = project.get("max_files", 0)
+        self.max_seconds = project.get("max_run_seconds", 0)
+        self.read_timeout = project.get("read_timeout_seconds", 0)
+        self.started = time.monotonic()
+        self.hits: List[str] = []
+
+    def hit(self, limit: str) -> None:
+        if limit not in self.hits:
+            self.hits.append(limit)
+
+    def exceeded(self, files_written: int, bytes_written: int, next_bytes: int) -> Optional[str]:
+        """Return the limit that stops the run before writing ``next_bytes`` more."""
+        if self.max_seconds and time.monotonic() - self.started > self.max_seconds:
+            return f"max run time ({self.max_seconds} s)"
+        if self.max_files and files_written >= self.max_files:
+            return f"max files ({self.max_files})"
+        if self.max_output_bytes and bytes_written + next_bytes > self.max_output_bytes:
+            return f"max output size ({self.max_output_bytes // 1024} KB)"
+        return None
+
+
+def cache_dir_for(output_path: str, name: str) -> str:
+    return os.path.join(output_path, "outputs", ".file_collector", name)
+
+
+def index_path_for(output_path: str, project_name: str) -> str:
+    return os.path.join(output_path, "outputs", f"{project_name}_index.json")
+
+
+def load_projects_file() -> Dict[str, Dict[str, Any]]:
+    path = config_path("projects.json")
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (IOError, json.JSONDecodeError) as e:
+            logging.error(f"Failed to load projects.json: {e}")
+    return {}
+
+
+def load_presets_file() -> Dict[str, Dict[str, str]]:
+    path = presets_path()
+    if path:
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (IOError, json.JSONDecodeError) as e:
+            logging.error(f"Failed to load presets.json: {e}")
+            return {"None": {}}
+    # Default presets if the file doesn't exist
+    return {
+        "None": {
+            "ignore_folders": "",
+            "ignore_filetypes": "",
+            "ignore_filenames": "",
+        }
+    }
+
+
+SPARK_CHARS = "\u2581\u2582\u2583\u2584\u2585\u2586\u2587\u2588"
+HISTORY_VIEW_RUNS = 30
+HISTORY_METRICS = [
+    ("duration", "Duration"),
+    ("files_read", "Files read"),
+    ("bytes_in", "Input size"),
+    ("bytes_out", "Output size"),
+    ("parts", "Parts"),
+    ("cache_hit_rate", "Cache hit rate"),
+]
+
+
+def history_path(project_name: str) -> str:
+    safe_name = re.sub(r"[^\w.-]", "_", project_name)
+    return os.path.join(config_dir(), "history", f"{safe_name}.jsonl")
+
+
+def append_history(project_name: str, record: Dict[str, Any]) -> None:
+    path = history_path(project_name)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+    except IOError as e:
+        logging.error(f"Failed to write run history: {e}")
+
+
+def load_history(project_name: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    path = history_path(project_name)
+    if not os.path.exists(path):
+        return []
+    records = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    except IOError as e:
+        logging.error(f"Failed to read run history: {e}")
+    return records[-limit:] if limit else records
+
+
+def sparkline(values: List[float]) -> str:
+    if not values:
+        return ""
+    low, high = min(values), max(values)
+    span = (high - low) or 1
+    return "".join(SPARK_CHARS[int((v - low) / span * (len(SPARK_CHARS) - 1))] for v in values)
+
+
+def format_metric(key: str, value: Any) -> str:
+    if value is None:
+        return "-"
+    if key in ("bytes_in", "bytes_out"):
+        return format_size(value)
+    if key == "duration":
+        return f"{value:.2f} s"
+    if key == "cache_hit_rate":
+        return f"{value:.0%}"
+    return str(value)
+
+
+def format_history_trends(records: List[Dict[str, Any]]) -> str:
+    lines = []
+    for key, label in HISTORY_METRICS:
+        values = [r[key] for r in records if r.get(key) is not None]
+        if values:
+            lines.append(
+                f"{label:<15} {sparkline(values):<{HISTORY_VIEW_RUNS}}  last {format_metric(key, values[-1])}"
+            )
+    return "\n".join(lines)
+
+
+def format_history_table(records: List[Dict[str, Any]]) -> str:
+    lines = []
+    for record in reversed(records):
+        line = (
+            f"{record['timestamp']}  {record['trigger']:<8} {record.get('mode', ''):<5} "
+            f"{format_metric('duration', record.get('duration')):>9}  "
+            f"{record.get('files_read', 0):>6} read  {record.get('files_skipped', 0):>4} skipped  "
+            f"{format_metric('bytes_out', record.get('bytes_out')):>9} out  {record.get('parts', 0):>3} parts"
+        )
+        if record.get("limits_hit"):
+            line += f"  partial: {', '.join(record['limits_hit'])}"
+        if record.get("error"):
+            line += f"  error: {record['error']}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def export_history(records: List[Dict[str, Any]], output_format: str) -> str:
+    if output_format == "json":
+        return json.dumps(records, indent=2)
+    import csv
+    import io
+    stage_names = sorted({stage for r in records for stage in r.get("stages", {})})
+    columns = [
+        "timestamp", "trigger", "mode", "duration", "files_read", "files_skipped",
+        "files_written", "bytes_in", "bytes_out", "parts", "cache_hit_rate", "limits_hit", "error",
+    ]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns + [f"stage_{name}" for name in stage_names])
+    for record in records:
+        row = [record.get(column, "") for column in columns]
+        row[columns.index("limits_hit")] = ";".join(record.get("limits_hit", []))
+        row += [record.get("stages", {}).get(name, "") for name in stage_names]
+        writer.writerow(row)
+    return buffer.getvalue()
+
+
+# Bytes read from each sampled file when estimating text ratio and tokens
+ESTIMATE_SAMPLE_BYTES = 64 * 1024
+# Rough average for source code and prose with common LLM tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def format_size(num_bytes: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if num_bytes < 1024 or unit == "GB":
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+
+def format_estimate(report: Dict[str, Any]) -> str:
+    lines = [
+        f"Files: {report['files']}",
+        f"Source size: {format_size(report['bytes'])}",
+    ]
+    if report["sampled"]:
+        lines.append(
+            f"Text ratio: {report['text_ratio']:.0%} of {report['sampled']} sampled files"
+        )
+        lines.append(f"Estimated tokens: ~{report['tokens']:,}")
+    lines.append(f"Estimated output: {format_size(report['output_bytes'])}")
+    lines.append(f"Estimated parts: {report['parts']}")
+    lines.append(f"Estimated in {report['seconds']:.2f} s")
+    if report["limits_hit"]:
+        lines.append(f"Stopped early: {', '.join(report['limits_hit'])}")
+    for title, key in (
+        ("Largest files", "largest_files"),
+        ("Largest folders", "largest_folders"),
+        ("Largest extensions", "largest_extensions"),
+    ):
+        lines.append("")
+        lines.append(f"{title}:")
+        for name, size in report[key]:
+            lines.append(f"  {format_size(size):>10}  {name}")
+    return "\n".join(lines)
+
+
+# Modified files larger than this are emitted in full instead of as a diff
+DELTA_DIFF_MAX_BYTES = 1024 * 1024
+
+
+class DeltaState:
+    """Per-file state of the last run plus a content-addressed store of what was emitted.
+
+    The stored contents let delta runs diff modified files and let compaction
+    rebuild a full output set without touching the source folders.
+    """
+
+    def __init__(self, output_path: str, project_name: str) -> None:
+        self.path = cache_dir_for(output_path, f"{project_name}_state.json")
+        self.blob_dir = cache_dir_for(output_path, f"{project_name}_blobs")
+        self.run = 0
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.refs: Dict[str, int] = {}
+        # Transform configuration the stored contents were produced with
+        self.transforms = ""
+
+    def load(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (IOError, json.JSONDecodeError) as e:
+            logging.warning(f"Failed to load delta state {self.path}: {e}")
+            return False
+        self.run = data.get("run", 0)
+        self.files = data.get("files", {})
+        self.transforms = data.get("transforms", "")
+        self.refs = {}
+        for entry in self.files.values():
+            self.refs[entry["hash"]] = self.refs.get(entry["hash"], 0) + 1
+        return True
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"run": self.run, "files": self.files, "transforms": self.transforms},
+                f,
+                separators=(",", ":"),
+            )
+        os.replace(tmp_path, self.path)
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def read_blob(self, digest: str) -> bytes:
+        with open(self.blob_path(digest), "rb") as f:
+            return f.read()
+
+    def store_blob(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        blob_path = self.blob_path(digest)
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            tmp_path = blob_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, blob_path)
+        return digest
+
+    def unchanged(self, file_path: str, mtime: float, size: int) -> bool:
+        entry = self.files.get(file_path)
+        return bool(entry) and entry["mtime"] == mtime and entry["size"] == size
+
+    def commit(self, file_path: str, mtime: float, size: int, digest: str, length: int) -> None:
+        previous = self.files.get(file_path)
+        if not previous or previous["hash"] != digest:
+            self.refs[digest] = self.refs.get(digest, 0) + 1
+            if previous:
+                self.release(previous["hash"])
+        self.files[file_path] = {"mtime": mtime, "size": size, "hash": digest, "length": length}
+
+    def remove(self, file_path: str) -> None:
+        entry = self.files.pop(file_path, None)
+        if entry:
+            self.release(entry["hash"])
+
+    def release(self, digest: str) -> None:
+        self.refs[digest] = self.refs.get(digest, 1) - 1
+        if self.refs[digest] <= 0:
+            del self.refs[digest]
+            try:
+                os.remove(self.blob_path(digest))
+            except OSError:
+                pass
+
+    def collect_garbage(self) -> None:
+        # Drop blobs left behind by runs that stopped before committing them
+        if not os.path.isdir(self.blob_dir):
+            return
+        for root, _, files in os.walk(self.blob_dir):
+            for file in files:
+                if file not in self.refs:
+                    try:
+                        os.remove(os.path.join(root, file))
+                    except OSError:
+                        pass
+
+
+def unified_diff_bytes(old: bytes, new: bytes, file_path: str) -> bytes:
+    diff = difflib.unified_diff(
+        old.decode("utf-8", errors="replace").splitlines(keepends=True),
+        new.decode("utf-8", errors="replace").splitlines(keepends=True),
+        fromfile=file_path,
+        tofile=file_path,
+    )
+    return "".join(line if line.endswith("\n") else line + "\n" for line in diff).encode("utf-8")
+
+
+class FileCollector:
+    """Runs a collection for one project, independently of the GUI."""
+
+    def __init__(
+        self,
+        project_name: str,
+        project: Dict[str, Any],
+        presets: Optional[Dict[str, Dict[str, str]]] = None,
+        folders: Optional[List[str]] = None,
+        trigger: str = "manual",
+    ) -> None:
+        self.project_name = project_name
+        self.trigger = trigger
+        self.project = project
+        self.presets = presets if presets is not None else load_presets_file()
+        self.folders = folders if folders is not None else project.get("folders", [])
+        self.output_path = project.get("output_path", "")
+        self.output_folder_path = os.path.join(self.output_path, "outputs")
+        self.max_file_size_kb = project.get("max_file_size", 1024)
+        self.workers = project.get("workers", 0)
+        self.budget = RunBudget(project)
+        self.prune_report: Optional[str] = None
+        self.stats: Dict[str, Any] = {
+            "files_read": 0,
+            "files_skipped": 0,
+            "files_written": 0,
+            "bytes_in": 0,
+            "bytes_out": 0,
+            "parts": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "stages": {},
+        }
+
+    def run(self) -> List[str]:
+        """Collect the project, record the run in its history and return the parts written."""
+        started = time.perf_counter()
+        error = None
+        try:
+            return self.collect()
+        except CollectionError as e:
+            error = str(e)
+            raise
+        finally:
+            append_history(self.project_name, self.history_record(time.perf_counter() - started, error))
+
+    def history_record(self, duration: float, error: Optional[str] = None) -> Dict[str, Any]:
+        lookups = self.stats["cache_hits"] + self.stats["cache_misses"]
+        record = {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "trigger": self.trigger,
+            "mode": self.stats.get("mode", ""),
+            "duration": round(duration, 3),
+            "stages": {name: round(value, 3) for name, value in self.stats["stages"].items()},
+            "files_read": self.stats["files_read"],
+            "files_skipped": self.stats["files_skipped"],
+            "files_written": self.stats["files_written"],
+            "bytes_in": self.stats["bytes_in"],
+            "bytes_out": self.stats["bytes_out"],
+            "parts": self.stats["parts"],
+            "cache_hit_rate": round(self.stats["cache_hits"] / lookups, 3) if lookups else None,
+            "limits_hit": self.budget.hits,
+        }
+        if error:
+            record["error"] = error
+        return record
+
+    def add_stage_time(self, stage: str, started: float) -> float:
+        now = time.perf_counter()
+        self.stats["stages"][stage] = self.stats["stages"].get(stage, 0) + now - started
+        return now
+
+    def time_stage(self, stage: str, iterable):
+        """Yield from ``iterable``, adding the time spent producing items to ``stage``."""
+        iterator = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add_stage_time(stage, started)
+                return
+            self.add_stage_time(stage, started)
+            yield item
+
+    def collect(self) -> List[str]:
+        if not self.folders or not self.output_path:
+            raise CollectionError("Folders or output path not specified.")
+        os.makedirs(self.output_folder_path, exist_ok=True)
+
+        state = None
+        if self.project.get("output_mode", "full") == "delta":
+            state = DeltaState(self.output_path, self.project_name)
+            if state.load():
+                fingerprint = ContentTransformer(self.project).fingerprint
+                if state.transforms != fingerprint:
+                    # Unchanged files would keep contents transformed the old way
+                    logging.info("Transforms changed since the last run, writing a new full base")
+                elif self.project.get("build_index", False) and not self.index_matches(fingerprint):
+                    # Deltas only index what they write, on top of the base
+                    logging.info("No search index for the delta base, writing a new full base")
+                else:
+                    return self.run_delta(state)
+        return self.run_full(state)
+
+    def iter_files(self, changed_since: Optional[str] = None, detector: Optional[ProjectDetector] = None):
+        return iter_project_files(
+            self.folders,
+            set(self.project.get("ignore_folders", [])),
+            set(self.project.get("ignore_filetypes", [])),
+            set(self.project.get("ignore_filenames", [])),
+            self.output_folder_path,
+            use_git=self.project.get("source_mode", "walk") == "git",
+            changed_since=(
+                self.project.get("git_changed_since", "") if changed_since is None else changed_since
+            ),
+            detector=detector,
+        )
+
+    def limit_files(self, file_paths, count_files: bool = True):
+        """Stop an enumeration once the run is out of time or, with ``count_files``, has enough files."""
+        for count, file_path in enumerate(file_paths):
+            limit = self.budget.exceeded(count if count_files else 0, 0, 0)
+            if limit:
+                self.budget.hit(limit)
+                return
+            yield file_path
+
+    def index_matches(self, fingerprint: str) -> bool:
+        search_index = SearchIndex(index_path_for(self.output_path, self.project_name))
+        return search_index.load() and search_index.transforms == fingerprint
+
+    def open_transformer(self) -> ContentTransformer:
+        return ContentTransformer(
+            self.project, cache_dir_for(self.output_path, f"{self.project_name}_transforms")
+        )
+
+    def open_detector(self) -> Optional[ProjectDetector]:
+        if not self.project.get("auto_detect", True):
+            return None
+        return ProjectDetector(
+            self.presets,
+            cache_dir_for(self.output_path, f"{self.project_name}_pruned.json"),
+        )
+
+    def finish_detector(self, detector: Optional[ProjectDetector]) -> None:
+        if detector:
+            detector.save()
+            self.prune_report = format_prune_report(detector.report())
+            logging.info(self.prune_report)
+
+    def open_writer(self, prefix: str, search_index: Optional[SearchIndex] = None) -> OutputWriter:
+        writer = OutputWriter(
+            self.output_folder_path,
+            f"{self.project_name}_{prefix}",
+            self.max_file_size_kb,
+            search_index=search_index,
+        )
+        try:
+            writer.open()
+        except IOError as e:
+            logging.error(f"Failed to open output file: {e}")
+            raise CollectionError(f"Failed to open output file: {e}")
+        return writer
+
+    def open_search_index(
+        self, transformer: ContentTransformer, keep_parts: bool = False
+    ) -> Optional[SearchIndex]:
+        if not self.project.get("build_index", False):
+            return None
+        search_index = SearchIndex(index_path_for(self.output_path, self.project_name))
+        search_index.load()
+        search_index.begin_update(transformer.fingerprint, keep_parts)
+        return search_index
+
+    def remove_parts(self, pattern: str, keep: Iterable[str] = ()) -> None:
+        part_re = re.compile(rf"^{re.escape(self.project_name)}_{pattern}\.txt$")
+        kept = {os.path.basename(path) for path in keep}
+        for file in os.listdir(self.output_folder_path):
+            if part_re.match(file) and file not in kept:
+                os.remove(os.path.join(self.output_folder_path, file))
+
+    def finish_writer(self, writer: OutputWriter, files_written: int) -> None:
+        self.stats["files_written"] = files_written
+        self.stats["bytes_out"] = writer.total_bytes
+        self.stats["parts"] = len(writer.paths)
+        if self.budget.hits:
+            logging.warning(f"Collection stopped early or incomplete: {', '.join(self.budget.hits)}")
+            writer.write_marker(
+                f"=== PARTIAL OUTPUT: {files_written} files written; "
+                f"limits hit: {', '.join(self.budget.hits)} ===\n"
+            )
+        writer.close()
+
+    def read_results(self, layout, transformer: ContentTransformer):
+        """Yield ``(file_path, starts_part, data, mtime, size)`` for every readable file."""
+        reader = read_layout(layout, transformer, self.workers, self.budget.read_timeout)
+        started = time.perf_counter()
+        # Lazily listed files are traversed while reading; that time is "scan"
+        scanned = self.stats["stages"].get("scan", 0)
+        # A part opened by an unreadable file is started by the next file instead
+        pending_start = False
+        try:
+            for file_path, starts_part, result in reader:
+                if isinstance(result, Exception):
+                    if isinstance(result, TimeoutError):
+                        self.budget.hit(f"read timeout ({self.budget.read_timeout} s)")
+                    logging.warning(f"Failed to read {file_path}: {result}")
+                    self.stats["files_skipped"] += 1
+                    pending_start = pending_start or starts_part
+                    # A long run of unreadable files must not outlast the time limit
+                    limit = self.budget.exceeded(0, 0, 0)
+                    if limit:
+                        self.budget.hit(limit)
+                        return
+                    continue
+                starts_part = starts_part or pending_start
+                pending_start = False
+                self.stats["files_read"] += 1
+                self.stats["bytes_in"] += result[2]
+                # Only time spent producing results counts as reading
+                previous_scanned, scanned = scanned, self.stats["stages"].get("scan", 0)
+                self.add_stage_time("read", started + scanned - previous_scanned)
+                yield (file_path, starts_part) + result
+                started = time.perf_counter()
+        finally:
+            reader.close()
+            self.stats["cache_hits"] += transformer.cache_hits
+            self.stats["cache_misses"] += transformer.cache_misses
+
+    def run_full(self, state: Optional[DeltaState] = None) -> List[str]:
+        run_started = time.time()
+        transformer = self.open_transformer()
+        search_index = self.open_search_index(transformer)
+        detector = self.open_detector()
+        writer = self.open_writer("output", search_index)
+        self.stats["mode"] = "full"
+
+        try:
+            # A delta base lists the same files as the deltas that follow it
+            file_paths = self.iter_files(changed_since="" if state else None, detector=detector)
+            if self.project.get("pack_files", False):
+                started = time.perf_counter()
+                # Files that will not decode would only reserve space they never
+                # use, so they neither enter the plan nor count towards max_files
+                text_paths = self.limit_files(p for p in file_paths if is_text_file(p))
+                layout = plan_packed_layout(stat_file_sizes(text_paths), writer.part_limit)
+                self.add_stage_time("scan", started)
+            else:
+                # Unreadable files do not count towards max_files when streaming
+                file_paths = self.limit_files(file_paths, count_files=False)
+                layout = [self.time_stage("scan", file_paths)]
+
+            files_written = 0
+            written_order = []
+            for file_path, starts_part, data, mtime, size in self.read_results(layout, transformer):
+                started = time.perf_counter()
+                header = f"File: {file_path}\n".encode("utf-8")
+                total_content = header + data + b"\n\n"
+                limit = self.budget.exceeded(files_written, writer.total_bytes, len(total_content))
+                if limit:
+                    self.budget.hit(limit)
+                    break
+                if starts_part:
+                    writer.start_new_part()
+                segments = writer.write_bytes(total_content)
+                files_written += 1
+                if search_index:
+                    search_index.add_file(file_path, mtime, size, segments, data)
+                if state:
+                    state.commit(file_path, mtime, size, state.store_blob(data), len(data))
+                    written_order.append(file_path)
+                self.add_stage_time("write", started)
+            started = time.perf_counter()
+            self.finish_writer(writer, files_written)
+            if search_index:
+                search_index.finish_update()
+            if state:
+                # A full run becomes the new base for the following deltas
+                seen = set(written_order)
+                for file_path in [p for p in state.files if p not in seen]:
+                    state.remove(file_path)
+                state.files = {p: state.files[p] for p in written_order}
+                state.run = 0
+                state.transforms = transformer.fingerprint
+                state.save()
+            # Parts of a larger earlier run and earlier deltas would be served
+            # and searched as if they belonged to this one
+            self.remove_parts(r"(?:output_\d+|delta_\d+_\d+)", keep=writer.paths)
+            self.finish_detector(detector)
+            changed_only = (
+                not state
+                and self.project.get("source_mode", "walk") == "git"
+                and self.project.get("git_changed_since", "")
+            )
+            if not self.budget.hits and not changed_only:
+                # Every file went through the transformer, so unused entries are stale
+                transformer.collect_garbage(run_started - TRANSFORM_CACHE_MTIME_SLACK)
+                # Earlier versions shared one cache between all projects
+                shutil.rmtree(cache_dir_for(self.output_path, "transforms"), ignore_errors=True)
+            self.add_stage_time("finalize", started)
+        except Exception as e:
+            writer.close()
+            logging.error(f"Error during file collection: {e}")
+            raise CollectionError(f"Error during file collection: {e}")
+        return writer.paths
+
+    def run_delta(self, state: DeltaState) -> List[str]:
+        """Write only what changed since the previous run into ``{project}_delta_{run}_N.txt``."""
+        transformer = self.open_transformer()
+        detector = self.open_detector()
+        run = state.run + 1
+        writer = None
+        self.stats["mode"] = "delta"
+        try:
+            started = time.perf_counter()
+            # Deletions can only be detected against the complete file list
+            # max_files limits the changes written, not the files compared
+            file_paths = list(
+                self.limit_files(self.iter_files(changed_since="", detector=detector), count_files=False)
+            )
+            if self.budget.hits:
+                # Files beyond a cut-off listing are not known to be deleted
+                deleted = []
+            else:
+                seen = set(file_paths)
+                deleted = [p for p in state.files if p not in seen]
+            to_read = []
+            for file_path in file_paths:
+                limit = self.budget.exceeded(0, 0, 0)
+                if limit:
+                    self.budget.hit(limit)
+                    break
+                try:
+                    stat = os.stat(file_path)
+                except OSError as e:
+                    logging.warning(f"Failed to stat {file_path}: {e}")
+                    continue
+                if not state.unchanged(file_path, stat.st_mtime, stat.st_size):
+                    to_read.append(file_path)
+            self.add_stage_time("scan", started)
+
+            changes = []
+            for file_path, _, data, mtime, size in self.read_results([to_read], transformer):
+                limit = self.budget.exceeded(0, 0, 0)
+                if limit:
+                    self.budget.hit(limit)
+                    break
+                previous = state.files.get(file_path)
+                digest = state.store_blob(data)
+                if previous and previous["hash"] == digest:
+                    # Touched but identical
+                    state.commit(file_path, mtime, size, digest, len(data))
+                    continue
+                status = "modified" if previous else "added"
+                changes.append((status, file_path, mtime, size, digest, len(data)))
+
+            added = [c[1] for c in changes if c[0] == "added"]
+            modified = [c[1] for c in changes if c[0] == "modified"]
+            summary = (
+                f"Delta {run} (changes since run {state.run})\n"
+                f"Added: {len(added)}\nModified: {len(modified)}\nDeleted: {len(deleted)}\n"
+                + "".join(f"Deleted: {p}\n" for p in deleted)
+                + "\n"
+            )
+            search_index = self.open_search_index(transformer, keep_parts=True)
+            writer = self.open_writer(f"delta_{run}", search_index)
+            writer.write_bytes(summary.encode("utf-8"))
+            for file_path in deleted:
+                state.remove(file_path)
+
+            started = time.perf_counter()
+            files_written = 0
+            # Files whose indexed content is replaced or gone
+            reindexed = set(deleted)
+            diffed = 0
+            for status, file_path, mtime, size, digest, length in changes:
+                data = state.read_blob(digest)
+                header = f"File: {file_path} ({status})\n"
+                is_diff = False
+                if status == "modified" and self.project.get("delta_diff", False):
+                    previous_length = state.files[file_path].get("length", 0)
+                    if max(length, previous_length) <= DELTA_DIFF_MAX_BYTES:
+                        old_data = state.read_blob(state.files[file_path]["hash"])
+                        data = unified_diff_bytes(old_data, data, file_path)
+                        header = f"File: {file_path} (modified, diff)\n"
+                        is_diff = True
+                total_content = header.encode("utf-8") + data + b"\n\n"
+                limit = self.budget.exceeded(files_written, writer.total_bytes, len(total_content))
+                if limit:
+                    self.budget.hit(limit)
+                    break
+                segments = writer.write_bytes(total_content)
+                files_written += 1
+                state.commit(file_path, mtime, size, digest, length)
+                reindexed.add(file_path)
+                if search_index and is_diff:
+                    # A diff is not the file's content, so it cannot be searched
+                    diffed += 1
+                elif search_index:
+                    search_index.add_file(file_path, mtime, size, segments, data)
+            started = self.add_stage_time("write", started)
+            self.finish_writer(writer, files_written)
+            if search_index:
+                search_index.carry_over(reindexed)
+                search_index.finish_update()
+                if diffed:
+                    logging.warning(
+                        f"{diffed} file(s) written as diffs are left out of the search "
+                        "index until the next full run or compaction"
+                    )
+            state.run = run
+            state.save()
+            self.finish_detector(detector)
+            self.add_stage_time("finalize", started)
+        except Exception as e:
+            if writer:
+                writer.close()
+            logging.error(f"Error during file collection: {e}")
+            raise CollectionError(f"Error during file collection: {e}")
+        return writer.paths
+
+    def estimate(self, sample_files: int = 0, top_n: int = 10) -> Dict[str, Any]:
+        """Estimate a run's output from traversal and stat alone.
+
+        With ``sample_files`` set, that many files are partially read to
+        estimate how much of the content is text and how many tokens it holds.
+        Transforms are not applied, so the estimate is an upper bound for them.
+        """
+        if not self.folders:
+            raise CollectionError("No folders specified.")
+        started = time.perf_counter()
+        detector = None
+        if self.project.get("auto_detect", True):
+            detector = ProjectDetector(self.presets)
+        entries = stat_file_sizes(self.limit_files(self.iter_files(detector=detector)))
+
+        folder_sizes: Dict[str, int] = {}
+        extension_sizes: Dict[str, int] = {}
+        roots = [os.path.normpath(folder) for folder in self.folders]
+        total_bytes = 0
+        for file_path, size in entries:
+            total_bytes += size
+            ext = os.path.splitext(file_path)[1] or "(none)"
+            extension_sizes[ext] = extension_sizes.get(ext, 0) + size
+            directory = os.path.dirname(file_path)
+            while True:
+                folder_sizes[directory] = folder_sizes.get(directory, 0) + size
+                parent = os.path.dirname(directory)
+                if directory in roots or parent == directory:
+                    break
+                directory = parent
+
+        text_ratio = 1.0
+        tokens = 0
+        sampled = 0
+        if sample_files and entries:
+            sample = random.Random(0).sample(entries, min(sample_files, len(entries)))
+            sample_bytes = 0
+            text_bytes = 0
+            text_chars = 0
+            for file_path, size in sample:
+                try:
+                    with open(file_path, "rb") as f:
+                        chunk = f.read(ESTIMATE_SAMPLE_BYTES)
+                    # final=False tolerates a character cut at the end of the chunk
+                    text = codecs.getincrementaldecoder("utf-8")().decode(chunk, final=False)
+                except (OSError, UnicodeDecodeError):
+                    sample_bytes += size
+                    continue
+                sample_bytes += size
+                text_bytes += size
+                if chunk:
+                    text_chars += int(len(text) * size / len(chunk))
+            sampled = len(sample)
+            if sample_bytes:
+                text_ratio = text_bytes / sample_bytes
+            if text_bytes:
+                tokens = int(text_chars / CHARS_PER_TOKEN * total_bytes / sample_bytes)
+
+        part_limit = int(self.max_file_size_kb * 1024)
+        output_bytes = int(total_bytes * text_ratio)
+        if self.project.get("pack_files", False):
+            parts = len(plan_packed_layout(entries, part_limit))
+        else:
+            parts = max(1, -(-output_bytes // part_limit))
+
+        def top(sizes):
+            return sorted(sizes.items(), key=lambda item: item[1], reverse=True)[:top_n]
+
+        return {
+            "files": len(entries),
+            "bytes": total_bytes,
+            "sampled": sampled,
+            "text_ratio": text_ratio,
+            "tokens": tokens,
+            "output_bytes": output_bytes,
+            "parts": parts,
+            "largest_files": sorted(entries, key=lambda entry: entry[1], reverse=True)[:top_n],
+            "largest_folders": top(folder_sizes),
+            "largest_extensions": top(extension_sizes),
+            "seconds": time.perf_counter() - started,
+            "limits_hit": self.budget.hits,
+        }
+
+    def compact(self) -> List[str]:
+        """Rebuild a full output set from the last run's state and drop the delta parts."""
+        if not self.output_path:
+            raise CollectionError("Output path not specified.")
+        state = DeltaState(self.output_path, self.project_name)
+        if not state.load():
+            raise CollectionError("No delta state found. Run the project in delta mode first.")
+
+        try:
+            self.remove_parts(r"(?:output_\d+|delta_\d+_\d+)")
+            search_index = self.open_search_index(ContentTransformer(self.project))
+            writer = self.open_writer("output", search_index)
+            if self.project.get("pack_files", False):
+                entries = [
+                    (p, len(f"File: {p}\n".encode("utf-8")) + entry["length"] + 2)
+                    for p, entry in state.files.items()
+                ]
+                layout = plan_packed_layout(entries, writer.part_limit)
+            else:
+                layout = [list(state.files)]
+
+            for part_files in layout:
+                writer.start_new_part()
+                for file_path in part_files:
+                    entry = state.files[file_path]
+                    data = state.read_blob(entry["hash"])
+                    header = f"File: {file_path}\n".encode("utf-8")
+                    segments = writer.write_bytes(header + data + b"\n\n")
+                    if search_index:
+                        search_index.add_file(file_path, entry["mtime"], entry["size"], segments, data)
+            writer.close()
+            if search_index:
+                search_index.finish_update()
+            state.run = 0
+            state.save()
+            state.collect_garbage()
+        except (IOError, OSError) as e:
+            logging.error(f"Error during compaction: {e}")
+            raise CollectionError(f"Error during compaction: {e}")
+        return writer.paths
+
+
+SERVER_CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class ReadCache:
+    """Thread-safe LRU of processed file contents, bounded by total bytes."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[bytes]:
+        with self.lock:
+            data = self.entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: Tuple, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                return
+            self.entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+def compile_glob(pattern: str) -> "re.Pattern":
+    """Compile a path glob where ``*``, ``?`` and ``[...]`` stay within one
+    segment and a ``**`` segment matches any number of directories."""
+    segments = pattern.strip("/").split("/")
+    regex = ""
+    for index, segment in enumerate(segments):
+        last = index == len(segments) - 1
+        if segment == "**":
+            regex += ".*" if last else "(?:.*/)?"
+            continue
+        i = 0
+        while i < len(segment):
+            char = segment[i]
+            end = segment.find("]", i + 2) if char == "[" else -1
+            if char == "*":
+                regex += "[^/]*"
+            elif char == "?":
+                regex += "[^/]"
+            elif end != -1:
+                body = segment[i + 1:end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                regex += f"(?!/)[{body}]"
+                i = end
+            else:
+                regex += re.escape(char)
+            i += 1
+        if not last:
+            regex += "/"
+    return re.compile(regex + r"\Z")
+
+
+def part_files_for(output_path: str, project_name: str) -> List[str]:
+    output_folder_path = os.path.join(output_path, "outputs")
+    part_re = re.compile(rf"^{re.escape(project_name)}_(?:output_\d+|delta_\d+_\d+)\.txt$")
+    if not os.path.isdir(output_folder_path):
+        return []
+    # Natural order so that _output_10 follows _output_9
+    return sorted(
+        (f for f in os.listdir(output_folder_path) if part_re.match(f)),
+        key=lambda f: [int(t) if t.isdigit() else t for t in re.split(r"(\d+)", f)],
+    )
+
+
+class CollectionRequestHandler:
+    """Serves collections over HTTP on localhost.
+
+    GET /projects                           project names
+    GET /projects/<name>/collect[?glob=..]  collection streamed with chunked encoding;
+                                            globs are relative to the project folders
+    GET /projects/<name>/parts              finished output parts
+    GET /projects/<name>/parts/<file>       one part, with Range support
+
+    Combined with http.server.BaseHTTPRequestHandler in serve_collections().
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args) -> None:
+        logging.info("%s - %s", self.address_string(), format % args)
+
+    def send_json(self, data: Any, status: int = 200) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_text_error(self, status: int, message: str) -> None:
+        body = f"{message}\n".encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def allowed_host(self) -> bool:
+        # Pages on other origins can reach 127.0.0.1 through DNS rebinding, but
+        # their requests still carry the attacker's host name
+        port = self.server.server_address[1]
+        host = (self.headers.get("Host") or "").strip().lower()
+        return host in (f"127.0.0.1:{port}", f"localhost:{port}", f"[::1]:{port}")
+
+    def do_GET(self) -> None:
+        if not self.allowed_host():
+            self.send_text_error(403, "Forbidden host")
+            return
+        url = urllib.parse.urlsplit(self.path)
+        parts = [urllib.parse.unquote(p) for p in url.path.split("/") if p]
+        query = urllib.parse.parse_qs(url.query)
+        projects = load_projects_file()
+        try:
+            if parts == ["projects"]:
+                self.send_json(sorted(projects))
+                return
+            if len(parts) < 3 or parts[0] != "projects" or parts[1] not in projects:
+                self.send_text_error(404, "Not found")
+                return
+            project_name, project = parts[1], projects[parts[1]]
+            if parts[2:] == ["collect"]:
+                self.stream_collection(project_name, project, query.get("glob", []))
+            elif parts[2:] == ["parts"]:
+                output_folder_path = os.path.join(project.get("output_path", ""), "outputs")
+                self.send_json([
+                    {"name": name, "size": os.path.getsize(os.path.join(output_folder_path, name))}
+                    for name in part_files_for(project.get("output_path", ""), project_name)
+                ])
+            elif len(parts) == 4 and parts[2] == "parts":
+                self.send_part(project_name, project, parts[3])
+            else:
+                self.send_text_error(404, "Not found")
+        except (BrokenPipeError, ConnectionResetError):
+            logging.info("Client disconnected")
+
+    def stream_collection(self, project_name: str, project: Dict[str, Any], globs: List[str]) -> None:
+        collector = FileCollector(project_name, project, self.server.presets)
+        if not collector.folders:
+            self.send_text_error(400, "No folders specified.")
+            return
+        # Share the transform cache of full runs when the project has one
+        transformer = collector.open_transformer() if collector.output_path else ContentTransformer(project)
+        transform_key = transformer.fingerprint
+        detector = ProjectDetector(self.server.presets) if project.get("auto_detect", True) else None
+        roots = [os.path.join(os.path.normpath(folder), "") for folder in collector.folders]
+        patterns = [compile_glob(glob) for glob in globs]
+        # Skipped files still count against the time limit, not max_files
+        file_paths = collector.limit_files(collector.iter_files(detector=detector), count_files=False)
+        try:
+            # An invalid git ref fails on the first file, before any output
+            first = next(file_paths, None)
+        except CollectionError as e:
+            self.send_text_error(400, str(e))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        if first is None:
+            self.wfile.write(b"0\r\n\r\n")
+            return
+
+        files_written = 0
+        bytes_written = 0
+        for file_path in itertools.chain([first], file_paths):
+            if patterns:
+                # Roots end with a separator so /a/foo does not claim /a/foobar/x
+                root = next((r for r in roots if file_path.startswith(r)), "")
+                relative_path = os.path.relpath(file_path, root).replace(os.sep, "/")
+                if not any(pattern.match(relative_path) for pattern in patterns):
+                    continue
+            try:
+                stat = os.stat(file_path)
+                key = (file_path, stat.st_mtime, stat.st_size, transform_key)
+                data = self.server.read_cache.get(key)
+                if data is None:
+                    data, _, _ = read_file_with_timeout(
+                        file_path, transformer, collector.budget.read_timeout
+                    )
+                    self.server.read_cache.put(key, data)
+            except Exception as e:
+                logging.warning(f"Failed to read {file_path}: {e}")
+                continue
+            total_content = f"File: {file_path}\n".encode("utf-8") + data + b"\n\n"
+            limit = collector.budget.exceeded(files_written, bytes_written, len(total_content))
+            if limit:
+                collector.budget.hit(limit)
+                break
+            self.write_chunk(total_content)
+            files_written += 1
+            bytes_written += len(total_content)
+        if collector.budget.hits:
+            self.write_chunk(
+                f"=== PARTIAL OUTPUT: {files_written} files written; "
+                f"limits hit: {', '.join(collector.budget.hits)} ===\n".encode("utf-8")
+            )
+        self.wfile.write(b"0\r\n\r\n")
+
+    def write_chunk(self, data: bytes) -> None:
+        if data:
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+    def send_part(self, project_name: str, project: Dict[str, Any], name: str) -> None:
+        output_path = project.get("output_path", "")
+        # Only serve parts that belong to the project, never arbitrary paths
+        if name not in part_files_for(output_path, project_name):
+            self.send_text_error(404, "Not found")
+            return
+        part_path = os.path.join(output_path, "outputs", name)
+        file_size = os.path.getsize(part_path)
+        start, end = 0, file_size - 1
+        status = 200
+        range_header = self.headers.get("Range")
+        if range_header:
+            match = RANGE_RE.match(range_header.strip())
+            if not match or not (match.group(1) or match.group(2)):
+                self.send_text_error(416, "Invalid range")
+                return
+            if match.group(1):
+                start = int(match.group(1))
+                if match.group(2):
+                    end = min(int(match.group(2)), file_size - 1)
+            else:
+                start = max(file_size - int(match.group(2)), 0)
+            if start >= file_size or start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{file_size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            status = 206
+
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(max(end - start + 1, 0)))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{file_size}")
+        self.end_headers()
+        with open(part_path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(SERVER_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+
+def make_collection_server(port: int, cache_mb: int):
+    import http.server
+    handler = type(
+        "CollectionRequestHandler",
+        (CollectionRequestHandler, http.server.BaseHTTPRequestHandler),
+        {},
+    )
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.presets = load_presets_file()
+    server.read_cache = ReadCache(cache_mb * 1024 * 1024)
+    return server
+
+
+def serve_collections(port: int, cache_mb: int) -> None:
+    server = make_collection_server(port, cache_mb)
+    logging.info(f"Serving collections on http://127.0.0.1:{port}/projects")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
 class FileCollectorApp:
     def __init__(self, root: ctk.CTk) -> None:
         self.root = root
@@ -73,30 +2485,50 @@ class FileCollectorApp:
         self.current_project: Optional[str] = None
         self.selected_folder_label: Optional[ctk.CTkLabel] = None
         self.auto_run_thread: Optional[threading.Thread] = None
-        self.observer: Optional[Observer] = None
+        self.observer = None
+        self.monitor_generation = 0
         self.files_changed: bool = False
         self.output_files: List[str] = []
         self.lock = threading.Lock()
+        self.project_data: Optional[Tuple[Dict, Dict]] = None
+        # Until the projects have loaded, saving would overwrite projects.json
+        self.projects_loaded = False
+        # Loaded search indexes by path, reused until a run rewrites them
+        self.search_indexes: Dict[str, Tuple[float, SearchIndex]] = {}
 
-        self.load_presets()
-        self.load_projects()
-
-        # Set up the GUI
+        # Set up the GUI; projects are filled in once they have loaded
         self.setup_gui()
 
+        # Bind theme change event
+        self.root.bind("<<ThemeChanged>>", self.on_theme_change)
+
+        # Read presets and projects off the main thread so the window paints first
+        threading.Thread(target=self.load_project_data, daemon=True).start()
+        self.root.after(10, self.poll_project_data)
+
+    def load_project_data(self) -> None:
+        self.project_data = (load_presets_file(), load_projects_file())
+
+    def poll_project_data(self) -> None:
+        if self.project_data is None:
+            self.root.after(10, self.poll_project_data)
+            return
+        self.presets, self.projects = self.project_data
+        self.projects_loaded = True
+        self.new_project_btn.configure(state="normal")
+        self.delete_project_btn.configure(state="normal")
+
         # Select the first project by default
         if self.projects:
             self.current_project = list(self.projects.keys())[0]
-            self.update_project_list()
-            self.create_main_content_widgets()
-            
-        # Bind theme change event
-        self.root.bind("<<ThemeChanged>>", self.on_theme_change)
+        self.update_project_list()
+        self.create_main_content_widgets()
 
     def load_settings(self) -> Dict:
-        if os.path.exists("settings.json"):
+        path = config_path("settings.json")
+        if os.path.exists(path):
             try:
-                with open("settings.json", "r") as f:
+                with open(path, "r") as f:
                     return json.load(f)
             except:
                 return {"theme": "System"}
@@ -104,7 +2536,7 @@ class FileCollectorApp:
 
     def save_settings(self) -> None:
         try:
-            with open("settings.json", "w") as f:
+            with open(config_path("settings.json"), "w") as f:
                 json.dump(self.settings, f)
         except Exception as e:
             logging.error(f"Failed to save settings: {e}")
@@ -192,6 +2624,20 @@ class FileCollectorApp:
                 "max_file_size": 1024,
                 "presets": [],
                 "auto_run": False,
+                "build_index": False,
+                "pack_files": False,
+                "transforms": [],
+                "extension_transforms": {},
+                "source_mode": "walk",
+                "git_changed_since": "",
+                "auto_detect": True,
+                "workers": 0,
+                "max_output_kb": 0,
+                "max_files": 0,
+                "max_run_seconds": 0,
+                "read_timeout_seconds": 0,
+                "output_mode": "full",
+                "delta_diff": False,
             }
             self.current_project = project_name
             self.save_projects_to_file()
@@ -215,12 +2661,18 @@ class FileCollectorApp:
 
         # Buttons
         self.new_project_btn = ctk.CTkButton(
-            self.sidebar_frame, text="New Project", command=self.create_new_project
+            self.sidebar_frame,
+            text="New Project",
+            command=self.create_new_project,
+            state="normal" if self.projects_loaded else "disabled",
         )
         self.new_project_btn.pack(pady=5, padx=10, fill="x")
 
         self.delete_project_btn = ctk.CTkButton(
-            self.sidebar_frame, text="Delete Project", command=self.delete_project
+            self.sidebar_frame,
+            text="Delete Project",
+            command=self.delete_project,
+            state="normal" if self.projects_loaded else "disabled",
         )
         self.delete_project_btn.pack(pady=5, padx=10, fill="x")
 
@@ -317,7 +2769,7 @@ class FileCollectorApp:
         tab_button_frame.pack(fill="x")
 
         self.tab_buttons = {}
-        tabs = ["Folders", "Ignore Settings", "Output Settings", "Output Files"]
+        tabs = ["Folders", "Ignore Settings", "Output Settings", "Output Files", "History"]
         for tab in tabs:
             btn = ctk.CTkButton(
                 tab_button_frame,
@@ -335,11 +2787,13 @@ class FileCollectorApp:
         self.ignore_tab = ctk.CTkFrame(self.main_content_frame)
         self.output_tab = ctk.CTkFrame(self.main_content_frame)
         self.output_files_tab = ctk.CTkFrame(self.main_content_frame)
+        self.history_tab = ctk.CTkFrame(self.main_content_frame)
 
         self.tab_frames["Folders"] = self.folders_tab
         self.tab_frames["Ignore Settings"] = self.ignore_tab
         self.tab_frames["Output Settings"] = self.output_tab
         self.tab_frames["Output Files"] = self.output_files_tab
+        self.tab_frames["History"] = self.history_tab
 
         for frame in self.tab_frames.values():
             frame.pack(fill="both", expand=True)
@@ -350,6 +2804,7 @@ class FileCollectorApp:
         self.setup_ignore_tab()
         self.setup_output_tab()
         self.setup_output_files_tab()
+        self.setup_history_tab()
 
         # Show default tab
         self.show_tab("Folders")
@@ -398,14 +2853,34 @@ class FileCollectorApp:
         for folder in project.get("folders", []):
             self.add_folder_to_list(folder)
 
+        # Load source settings
+        self.use_git_var.set(project.get("source_mode", "walk") == "git")
+        self.git_changed_since_var.set(project.get("git_changed_since", ""))
+
         # Load ignore settings
         self.ignore_folders_var.set(",".join(project.get("ignore_folders", [])))
         self.ignore_filetypes_var.set(",".join(project.get("ignore_filetypes", [])))
         self.ignore_filenames_var.set(",".join(project.get("ignore_filenames", [])))
+        self.auto_detect_var.set(project.get("auto_detect", True))
+
+        # Load search index and layout settings
+        self.build_index_var.set(project.get("build_index", False))
+        self.pack_files_var.set(project.get("pack_files", False))
+        self.delta_mode_var.set(project.get("output_mode", "full") == "delta")
+        self.delta_diff_var.set(project.get("delta_diff", False))
+
+        # Load transform settings
+        self.transforms_var.set(",".join(project.get("transforms", [])))
+        self.extension_transforms_var.set(
+            format_extension_transforms(project.get("extension_transforms", {}))
+        )
 
         # Load output settings
         self.output_path_var.set(project.get("output_path", ""))
         self.max_file_size_var.set(str(project.get("max_file_size", 1024)))
+        self.workers_var.set(str(project.get("workers", 0)))
+        for key, var in self.budget_vars.items():
+            var.set(str(project.get(key, 0)))
 
         # Load auto-run setting
         self.auto_run_var.set(project.get("auto_run", False))
@@ -436,6 +2911,27 @@ class FileCollectorApp:
         )
         self.remove_folder_btn.pack(side="right", padx=5)
 
+        # Git Source
+        git_frame = ctk.CTkFrame(self.folders_tab)
+        git_frame.pack(fill="x", padx=10, pady=5)
+
+        self.use_git_var = ctk.BooleanVar(value=False)
+        self.use_git_checkbox = ctk.CTkCheckBox(
+            git_frame,
+            text="Use git index",
+            variable=self.use_git_var,
+            command=self.save_project,
+        )
+        self.use_git_checkbox.pack(side="left", padx=5)
+
+        ctk.CTkLabel(git_frame, text="Only changed since ref:").pack(side="left", padx=5)
+        self.git_changed_since_var = tk.StringVar()
+        self.git_changed_since_entry = ctk.CTkEntry(
+            git_frame, textvariable=self.git_changed_since_var, width=120
+        )
+        self.git_changed_since_entry.pack(side="left", padx=5)
+        self.git_changed_since_var.trace_add('write', lambda *args: self.save_project())
+
     def setup_ignore_tab(self) -> None:
         ignore_label = ctk.CTkLabel(
             self.ignore_tab,
@@ -471,6 +2967,20 @@ class FileCollectorApp:
         self.ignore_filenames_entry.pack(fill="x", padx=10, pady=5)
         self.ignore_filenames_var.trace_add('write', lambda *args: self.save_project())
 
+        # Project Type Detection
+        self.auto_detect_var = ctk.BooleanVar(value=True)
+        self.auto_detect_checkbox = ctk.CTkCheckBox(
+            self.ignore_tab,
+            text="Auto-detect project types and apply their presets per folder",
+            variable=self.auto_detect_var,
+            command=self.save_project,
+        )
+        self.auto_detect_checkbox.pack(anchor="w", padx=10, pady=5)
+        self.prune_report_label = ctk.CTkLabel(
+            self.ignore_tab, text="", text_color=self.colors["secondary_text"]
+        )
+        self.prune_report_label.pack(anchor="w", padx=10)
+
         # Preset Selection
         ctk.CTkLabel(self.ignore_tab, text="Presets:").pack(anchor="w", padx=10, pady=5)
         self.preset_vars = {}
@@ -523,11 +3033,248 @@ class FileCollectorApp:
         self.max_file_size_entry.pack(side="left", padx=5)
         self.max_file_size_var.trace_add('write', lambda *args: self.save_project())
 
+        # Dry-run Estimate
+        estimate_frame = ctk.CTkFrame(self.output_tab)
+        estimate_frame.pack(fill="x", padx=10, pady=5)
+        self.estimate_btn = ctk.CTkButton(
+            estimate_frame, text="Estimate Output", command=self.estimate_output, width=120
+        )
+        self.estimate_btn.pack(side="left", padx=5)
+        self.estimate_sample_var = ctk.BooleanVar(value=True)
+        ctk.CTkCheckBox(
+            estimate_frame,
+            text="Sample file contents",
+            variable=self.estimate_sample_var,
+        ).pack(side="left", padx=5)
+        self.estimate_box = ctk.CTkTextbox(self.output_tab, height=120)
+        self.estimate_box.pack(fill="x", padx=10, pady=5)
+        self.estimate_box.configure(state="disabled")
+
+        # Worker Processes
+        self.workers_var = tk.StringVar(value="0")
+        workers_frame = ctk.CTkFrame(self.output_tab)
+        workers_frame.pack(fill="x", padx=10, pady=5)
+
+        ctk.CTkLabel(workers_frame, text="Worker processes (0 = off):").pack(side="left")
+        self.workers_entry = ctk.CTkEntry(
+            workers_frame, textvariable=self.workers_var, width=100
+        )
+        self.workers_entry.pack(side="left", padx=5)
+        self.workers_var.trace_add('write', lambda *args: self.save_project())
+
+        # Run Budgets
+        budget_frame = ctk.CTkFrame(self.output_tab)
+        budget_frame.pack(fill="x", padx=10, pady=5)
+        ctk.CTkLabel(budget_frame, text="Limits (0 = none):").pack(side="left")
+        self.budget_vars = {}
+        budget_fields = [
+            ("max_output_kb", "Output KB"),
+            ("max_files", "Files"),
+            ("max_run_seconds", "Seconds"),
+            ("read_timeout_seconds", "Read timeout (s)"),
+        ]
+        for key, label in budget_fields:
+            var = tk.StringVar(value="0")
+            ctk.CTkLabel(budget_frame, text=f"{label}:").pack(side="left", padx=(10, 0))
+            ctk.CTkEntry(budget_frame, textvariable=var, width=70).pack(side="left", padx=5)
+            var.trace_add('write', lambda *args: self.save_project())
+            self.budget_vars[key] = var
+
+        # Search Index
+        self.build_index_var = ctk.BooleanVar(value=False)
+        self.build_index_checkbox = ctk.CTkCheckBox(
+            self.output_tab,
+            text="Build search index",
+            variable=self.build_index_var,
+            command=self.save_project,
+        )
+        self.build_index_checkbox.pack(anchor="w", padx=10, pady=5)
+
+        # Part Layout
+        self.pack_files_var = ctk.BooleanVar(value=False)
+        self.pack_files_checkbox = ctk.CTkCheckBox(
+            self.output_tab,
+            text="Pack whole files into parts (fewer split files)",
+            variable=self.pack_files_var,
+            command=self.save_project,
+        )
+        self.pack_files_checkbox.pack(anchor="w", padx=10, pady=5)
+
+        # Delta Output
+        delta_frame = ctk.CTkFrame(self.output_tab)
+        delta_frame.pack(fill="x", padx=10, pady=5)
+
+        self.delta_mode_var = ctk.BooleanVar(value=False)
+        self.delta_mode_checkbox = ctk.CTkCheckBox(
+            delta_frame,
+            text="Delta output (only changes since the previous run)",
+            variable=self.delta_mode_var,
+            command=self.save_project,
+        )
+        self.delta_mode_checkbox.pack(side="left", padx=5)
+
+        self.delta_diff_var = ctk.BooleanVar(value=False)
+        self.delta_diff_checkbox = ctk.CTkCheckBox(
+            delta_frame,
+            text="Unified diffs",
+            variable=self.delta_diff_var,
+            command=self.save_project,
+        )
+        self.delta_diff_checkbox.pack(side="left", padx=5)
+
+        self.compact_btn = ctk.CTkButton(
+            delta_frame, text="Compact Deltas", command=self.compact_deltas, width=120
+        )
+        self.compact_btn.pack(side="right", padx=5)
+
+        # Content Transforms
+        self.transforms_var = tk.StringVar()
+        ctk.CTkLabel(
+            self.output_tab,
+            text=f"Transforms ({', '.join(TRANSFORMS)}):",
+        ).pack(anchor="w", padx=10)
+        self.transforms_entry = ctk.CTkEntry(
+            self.output_tab, textvariable=self.transforms_var
+        )
+        self.transforms_entry.pack(fill="x", padx=10, pady=5)
+        self.transforms_var.trace_add('write', lambda *args: self.save_project())
+
+        self.extension_transforms_var = tk.StringVar()
+        ctk.CTkLabel(
+            self.output_tab,
+            text="Per-extension transforms (e.g. .js=strip_comments+truncate; .md=collapse_blank_lines):",
+        ).pack(anchor="w", padx=10)
+        self.extension_transforms_entry = ctk.CTkEntry(
+            self.output_tab, textvariable=self.extension_transforms_var
+        )
+        self.extension_transforms_entry.pack(fill="x", padx=10, pady=5)
+        self.extension_transforms_var.trace_add('write', lambda *args: self.save_project())
+
     def setup_output_files_tab(self) -> None:
+        # Search
+        search_frame = ctk.CTkFrame(self.output_files_tab)
+        search_frame.pack(fill="x", padx=10, pady=5)
+
+        self.search_var = tk.StringVar()
+        self.search_entry = ctk.CTkEntry(search_frame, textvariable=self.search_var)
+        self.search_entry.pack(side="left", fill="x", expand=True, padx=5)
+        self.search_entry.bind("<Return>", lambda e: self.search_collected_content())
+
+        self.search_regex_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(
+            search_frame, text="Regex", variable=self.search_regex_var, width=70
+        ).pack(side="left", padx=5)
+
+        self.search_btn = ctk.CTkButton(
+            search_frame, text="Search", command=self.search_collected_content, width=80
+        )
+        self.search_btn.pack(side="right", padx=5)
+
+        self.search_results_box = ctk.CTkTextbox(self.output_files_tab, height=150)
+        self.search_results_box.pack(fill="x", padx=10, pady=5)
+        self.search_results_box.configure(state="disabled")
+
         self.output_files_frame = ctk.CTkScrollableFrame(self.output_files_tab)
         self.output_files_frame.pack(fill="both", expand=True, padx=10, pady=10)
         self.update_output_files_tab()
 
+    def setup_history_tab(self) -> None:
+        history_font = ctk.CTkFont(family="Courier", size=13)
+        self.history_trends_label = ctk.CTkLabel(
+            self.history_tab, text="", font=history_font, justify="left", anchor="w"
+        )
+        self.history_trends_label.pack(fill="x", padx=10, pady=10)
+
+        self.history_box = ctk.CTkTextbox(self.history_tab, font=history_font, wrap="none")
+        self.history_box.pack(fill="both", expand=True, padx=10, pady=5)
+        self.history_box.configure(state="disabled")
+
+        export_frame = ctk.CTkFrame(self.history_tab)
+        export_frame.pack(fill="x", padx=10, pady=5)
+        ctk.CTkButton(
+            export_frame, text="Export CSV", command=lambda: self.export_history("csv"), width=120
+        ).pack(side="left", padx=5)
+        ctk.CTkButton(
+            export_frame, text="Export JSON", command=lambda: self.export_history("json"), width=120
+        ).pack(side="left", padx=5)
+
+    def update_history_tab(self) -> None:
+        records = load_history(self.current_project, HISTORY_VIEW_RUNS) if self.current_project else []
+        if records:
+            trends = f"Last {len(records)} runs, oldest to newest\n\n" + format_history_trends(records)
+        else:
+            trends = "No runs recorded yet."
+        self.history_trends_label.configure(text=trends)
+        self.history_box.configure(state="normal")
+        self.history_box.delete("1.0", "end")
+        self.history_box.insert("1.0", format_history_table(records))
+        self.history_box.configure(state="disabled")
+
+    def export_history(self, output_format: str) -> None:
+        if not self.current_project:
+            messagebox.showwarning("No Project", "Please select a project first.")
+            return
+        path = filedialog.asksaveasfilename(
+            defaultextension=f".{output_format}",
+            initialfile=f"{self.current_project}_history.{output_format}",
+            filetypes=[(output_format.upper(), f"*.{output_format}")],
+        )
+        if not path:
+            return
+        try:
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                f.write(export_history(load_history(self.current_project), output_format))
+        except IOError as e:
+            messagebox.showerror("Error", f"Failed to export history: {e}")
+
+    def search_collected_content(self) -> None:
+        if not self.current_project:
+            messagebox.showwarning("No Project", "Please select a project first.")
+            return
+        query = self.search_var.get()
+        if not query:
+            return
+        project = self.projects[self.current_project]
+        index = self.load_search_index(index_path_for(project.get("output_path", ""), self.current_project))
+        if not index:
+            messagebox.showwarning(
+                "No Index",
+                "No search index found. Enable 'Build search index' and run the collection.",
+            )
+            return
+        try:
+            start = time.perf_counter()
+            results = index.search(query, regex=self.search_regex_var.get())
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        except re.error as e:
+            messagebox.showerror("Invalid Regex", str(e))
+            return
+
+        lines = [f"{len(results)} matches in {elapsed_ms:.0f} ms"]
+        for result in results:
+            lines.append(
+                f"{result['path']}:{result['line']} "
+                f"[{result['part']} @ {result['offset']}] {result['text'].strip()}"
+            )
+        self.search_results_box.configure(state="normal")
+        self.search_results_box.delete("1.0", "end")
+        self.search_results_box.insert("1.0", "\n".join(lines))
+        self.search_results_box.configure(state="disabled")
+
+    def load_search_index(self, path: str) -> Optional[SearchIndex]:
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        cached = self.search_indexes.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        index = SearchIndex(path)
+        if not index.load():
+            return None
+        self.search_indexes[path] = (mtime, index)
+        return index
+
     def update_output_files_tab(self) -> None:
         for widget in self.output_files_frame.winfo_children():
             widget.destroy()
@@ -573,6 +3320,8 @@ class FileCollectorApp:
 
         # Show selected frame
         self.tab_frames[tab_name].pack(fill="both", expand=True)
+        if tab_name == "History":
+            self.update_history_tab()
 
         # Highlight selected button
         self.tab_buttons[tab_name].configure(fg_color=("#3B8ED0", "#1F6AA5"))
@@ -678,29 +3427,55 @@ class FileCollectorApp:
     def start_file_monitoring(self) -> None:
         self.stop_file_monitoring()
         if self.auto_run_var.get() and self.current_project:
-            event_handler = FileChangeHandler(self)
-            self.observer = Observer()
             folders = [child.cget("text") for child in self.folder_list_frame.winfo_children()]
-            for folder in folders:
-                if os.path.exists(folder):
-                    self.observer.schedule(event_handler, path=folder, recursive=True)
-            self.observer.start()
+            # Recursive watches on large trees take a while to set up
+            threading.Thread(
+                target=self.start_observer, args=(folders, self.monitor_generation), daemon=True
+            ).start()
             # Start auto-run thread
             self.auto_run_thread = threading.Thread(target=self.auto_run_loop, daemon=True)
             self.auto_run_thread.start()
 
+    def start_observer(self, folders: List[str], generation: int) -> None:
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            self.root.after(0, lambda: messagebox.showerror(
+                "Missing Dependency",
+                "The 'watchdog' library is required for file monitoring. Please install it using 'pip install watchdog'."
+            ))
+            return
+        handler_class = type("FileChangeHandler", (FileChangeHandler, FileSystemEventHandler), {})
+        event_handler = handler_class(self)
+        observer = Observer()
+        for folder in folders:
+            if os.path.exists(folder):
+                observer.schedule(event_handler, path=folder, recursive=True)
+        observer.start()
+        with self.lock:
+            if generation == self.monitor_generation:
+                self.observer = observer
+                return
+        # Monitoring was stopped or restarted while this observer was starting
+        observer.stop()
+        observer.join()
+
     def stop_file_monitoring(self) -> None:
-        if self.observer:
-            self.observer.stop()
-            self.observer.join()
+        with self.lock:
+            self.monitor_generation += 1
+            observer = self.observer
             self.observer = None
+        if observer:
+            observer.stop()
+            observer.join()
 
     def auto_run_loop(self) -> None:
         while self.auto_run_var.get():
             with self.lock:
                 if self.files_changed:
                     self.files_changed = False
-                    self.root.after(0, self.run_file_collection)
+                    self.root.after(0, lambda: self.run_file_collection("auto-run"))
             time.sleep(1)
 
     def update_change_indicator(self) -> None:
@@ -725,6 +3500,7 @@ class FileCollectorApp:
         output_path = project.get("output_path", "")
         output_folder_path = os.path.join(output_path, "outputs")
         if output_folder_path and os.path.exists(output_folder_path):
+            import subprocess
             if platform.system() == "Windows":
                 os.startfile(output_folder_path)
             elif platform.system() == "Darwin":
@@ -741,6 +3517,17 @@ class FileCollectorApp:
             max_file_size = int(self.max_file_size_var.get())
         except ValueError:
             max_file_size = 1024  # Default value
+        try:
+            workers = max(int(self.workers_var.get()), 0)
+        except ValueError:
+            workers = 0
+        budgets = {}
+        for key, var in self.budget_vars.items():
+            try:
+                value = max(float(var.get()), 0)
+            except ValueError:
+                value = 0
+            budgets[key] = int(value) if value.is_integer() else value
         project = {
             "folders": [
                 child.cget("text") for child in self.folder_list_frame.winfo_children()
@@ -762,49 +3549,44 @@ class FileCollectorApp:
             ],
             "output_path": self.output_path_var.get(),
             "max_file_size": max_file_size,
+            "workers": workers,
+            **budgets,
             "presets": [name for name, var in self.preset_vars.items() if var.get()],
             "auto_run": self.auto_run_var.get(),
+            "source_mode": "git" if self.use_git_var.get() else "walk",
+            "git_changed_since": self.git_changed_since_var.get().strip(),
+            "auto_detect": self.auto_detect_var.get(),
+            "build_index": self.build_index_var.get(),
+            "pack_files": self.pack_files_var.get(),
+            "output_mode": "delta" if self.delta_mode_var.get() else "full",
+            "delta_diff": self.delta_diff_var.get(),
+            "transforms": [
+                x.strip()
+                for x in self.transforms_var.get().split(",")
+                if x.strip()
+            ],
+            "extension_transforms": parse_extension_transforms(
+                self.extension_transforms_var.get()
+            ),
+        }
+        # Keep settings that are only configurable in projects.json
+        self.projects[self.current_project] = {
+            **self.projects.get(self.current_project, {}),
+            **project,
         }
-        self.projects[self.current_project] = project
         self.save_projects_to_file()
 
     def save_projects_to_file(self) -> None:
+        if not self.projects_loaded:
+            logging.warning("Projects have not loaded yet; not saving projects.json")
+            return
         try:
-            with open("projects.json", "w") as f:
+            with open(config_path("projects.json"), "w") as f:
                 json.dump(self.projects, f)
         except IOError as e:
             logging.error(f"Failed to save projects: {e}")
             messagebox.showerror("Error", "Failed to save projects.")
 
-    def load_projects(self) -> None:
-        if os.path.exists("projects.json"):
-            try:
-                with open("projects.json", "r") as f:
-                    self.projects = json.load(f)
-            except (IOError, json.JSONDecodeError) as e:
-                logging.error(f"Failed to load projects.json: {e}")
-                self.projects = {}
-        else:
-            self.projects = {}
-
-    def load_presets(self) -> None:
-        if os.path.exists("presets.json"):
-            try:
-                with open("presets.json", "r") as f:
-                    self.presets = json.load(f)
-            except (IOError, json.JSONDecodeError) as e:
-                logging.error(f"Failed to load presets.json: {e}")
-                self.presets = {"None": {}}
-        else:
-            # Default presets if the file doesn't exist
-            self.presets = {
-                "None": {
-                    "ignore_folders": "",
-                    "ignore_filetypes": "",
-                    "ignore_filenames": "",
-                }
-            }
-
     def copy_to_clipboard(self, text: str) -> None:
         self.root.clipboard_clear()
         self.root.clipboard_append(text)
@@ -821,107 +3603,244 @@ class FileCollectorApp:
             logging.error(f"Failed to copy content: {e}")
             messagebox.showerror("Error", "Failed to copy file content.")
 
-    def run_file_collection(self) -> None:
+    def run_file_collection(self, trigger: str = "manual") -> None:
         if not self.current_project:
             self.root.after(0, lambda: messagebox.showerror("Error", "No project selected."))
             return
 
         project = self.projects[self.current_project]
         folders = [child.cget("text") for child in self.folder_list_frame.winfo_children()]
-        ignore_folders: Set[str] = set(project["ignore_folders"])
-        ignore_filetypes: Set[str] = set(project["ignore_filetypes"])
-        ignore_filenames: Set[str] = set(project["ignore_filenames"])
-        output_path = project["output_path"]
-        max_file_size_kb = project.get("max_file_size", 1024)
+        collector = FileCollector(self.current_project, project, self.presets, folders, trigger)
+        try:
+            output_files = collector.run()
+        except CollectionError as e:
+            self.root.after(0, self.update_history_tab)
+            self.root.after(0, lambda: messagebox.showerror("Error", str(e)))
+            return
 
-        if not folders or not output_path:
-            self.root.after(0, lambda: messagebox.showerror(
-                "Error", "Folders or output path not specified."
+        if collector.prune_report:
+            self.root.after(0, lambda: self.prune_report_label.configure(text=collector.prune_report))
+        self.output_files = output_files
+        self.files_changed = False
+        self.root.after(0, self.update_change_indicator)
+        self.root.after(0, self.update_output_files_tab)
+        self.root.after(0, self.update_history_tab)
+        # Update status label with timestamp
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        hits = collector.budget.hits
+        if hits:
+            self.root.after(0, lambda: self.change_indicator.configure(
+                text=f"Last run: {timestamp} (partial: {', '.join(hits)})",
+                fg_color=self.colors["status_warning"],
             ))
+        else:
+            self.root.after(0, lambda: self.change_indicator.configure(
+                text=f"Last run: {timestamp}",
+                fg_color=self.colors["status_success"],
+            ))
+
+    def estimate_output(self) -> None:
+        if not self.current_project:
+            messagebox.showwarning("No Project", "Please select a project first.")
             return
+        self.save_project()
+        project = self.projects[self.current_project]
+        collector = FileCollector(self.current_project, project, self.presets)
+        sample_files = 200 if self.estimate_sample_var.get() else 0
+        self.estimate_btn.configure(state="disabled")
 
-        output_folder_path = os.path.join(output_path, "outputs")
-        os.makedirs(output_folder_path, exist_ok=True)
+        def worker():
+            try:
+                text = format_estimate(collector.estimate(sample_files=sample_files))
+            except CollectionError as e:
+                text = str(e)
+            self.root.after(0, lambda: self.show_estimate(text))
 
-        collected_size = 0
-        file_index = 1
-        output_file_paths = []
-        output_file_path = os.path.join(
-            output_folder_path, f"{self.current_project}_output_{file_index}.txt"
+        threading.Thread(target=worker, daemon=True).start()
+
+    def show_estimate(self, text: str) -> None:
+        self.estimate_btn.configure(state="normal")
+        self.estimate_box.configure(state="normal")
+        self.estimate_box.delete("1.0", "end")
+        self.estimate_box.insert("1.0", text)
+        self.estimate_box.configure(state="disabled")
+
+    def compact_deltas(self) -> None:
+        if not self.current_project:
+            messagebox.showwarning("No Project", "Please select a project first.")
+            return
+        collector = FileCollector(self.current_project, self.projects[self.current_project], self.presets)
+        try:
+            self.output_files = collector.compact()
+        except CollectionError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.update_output_files_tab()
+        messagebox.showinfo("Compacted", f"Wrote {len(self.output_files)} full output file(s).")
+
+def run_search_command(args: argparse.Namespace) -> int:
+    projects = load_projects_file()
+    project = projects.get(args.project)
+    if project is None:
+        print(f"Unknown project: {args.project}")
+        return 1
+    index = SearchIndex(index_path_for(project.get("output_path", ""), args.project))
+    if not index.load():
+        print(f"No search index for project '{args.project}'. Enable 'build_index' and run it.")
+        return 1
+    try:
+        results = index.search(
+            args.query, regex=args.regex, ignore_case=args.ignore_case, limit=args.limit
+        )
+    except re.error as e:
+        print(f"Invalid regex: {e}")
+        return 1
+    for result in results:
+        print(
+            f"{result['path']}:{result['line']}: "
+            f"[{result['part']} @ {result['offset']}] {result['text']}"
         )
-        output_file_paths.append(output_file_path)
+    return 0
+
+
+def run_compact_command(args: argparse.Namespace) -> int:
+    projects = load_projects_file()
+    project = projects.get(args.project)
+    if project is None:
+        print(f"Unknown project: {args.project}")
+        return 1
+    try:
+        output_files = FileCollector(args.project, project).compact()
+    except CollectionError as e:
+        print(e)
+        return 1
+    for output_file in output_files:
+        print(output_file)
+    return 0
+
+
+def run_estimate_command(args: argparse.Namespace) -> int:
+    projects = load_projects_file()
+    project = projects.get(args.project)
+    if project is None:
+        print(f"Unknown project: {args.project}")
+        return 1
+    try:
+        report = FileCollector(args.project, project).estimate(
+            sample_files=args.sample, top_n=args.top
+        )
+    except CollectionError as e:
+        print(e)
+        return 1
+    print(format_estimate(report))
+    return 0
+
+
+def run_collect_command(args: argparse.Namespace) -> int:
+    projects = load_projects_file()
+    project = projects.get(args.project)
+    if project is None:
+        print(f"Unknown project: {args.project}")
+        return 1
+    collector = FileCollector(args.project, project, trigger="cli")
+    try:
+        output_files = collector.run()
+    except CollectionError as e:
+        print(e)
+        return 1
+    for output_file in output_files:
+        print(output_file)
+    if collector.budget.hits:
+        print(f"Partial run: {', '.join(collector.budget.hits)}")
+    return 0
+
+
+def run_history_command(args: argparse.Namespace) -> int:
+    records = load_history(args.project, args.limit)
+    if not records:
+        print(f"No runs recorded for project '{args.project}'.")
+        return 1
+    if args.format == "table":
+        text = format_history_trends(records) + "\n\n" + format_history_table(records)
+    else:
+        text = export_history(records, args.format)
+    if args.output:
         try:
-            output_file = open(output_file_path, "w", encoding="utf-8")
-            try:
-                def write_content(content, header):
-                    nonlocal collected_size, output_file, output_file_paths, file_index
-                    total_content = f"{header}{content}\n\n"
-                    total_content_bytes = total_content.encode('utf-8')
-                    total_length = len(total_content_bytes)
-                    start = 0
-                    while start < total_length:
-                        remaining_space_kb = max_file_size_kb - collected_size
-                        if remaining_space_kb <= 0:
-                            output_file.close()
-                            file_index += 1
-                            output_file_path = os.path.join(
-                                output_folder_path, f"{self.current_project}_output_{file_index}.txt"
-                            )
-                            output_file_paths.append(output_file_path)
-                            output_file = open(output_file_path, "w", encoding="utf-8")
-                            collected_size = 0
-                            remaining_space_kb = max_file_size_kb
-
-                        remaining_space_bytes = int(remaining_space_kb * 1024)
-                        end = start + remaining_space_bytes
-                        chunk_bytes = total_content_bytes[start:end]
-                        chunk = chunk_bytes.decode('utf-8', errors='ignore')
-                        output_file.write(chunk)
-                        chunk_size_kb = len(chunk_bytes) / 1024
-                        collected_size += chunk_size_kb
-                        start = end
-
-                for root_folder in folders:
-                    for root, dirs, files in os.walk(root_folder):
-                        # Remove the output folder from dirs to prevent os.walk() from traversing it
-                        dirs[:] = [d for d in dirs if os.path.join(root, d) != output_folder_path and d not in ignore_folders]
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            file_ext = os.path.splitext(file)[1]
-                            if (file in ignore_filenames) or (file_ext in ignore_filetypes):
-                                continue
-                            if file_path.startswith(output_folder_path):
-                                continue
-                            try:
-                                with open(file_path, "r", encoding="utf-8") as f:
-                                    content = f.read()
-                                header = f"File: {file_path}\n"
-                                write_content(content, header)
-                            except Exception as e:
-                                logging.warning(f"Failed to read {file_path}: {e}")
-                output_file.close()
-            except Exception as e:
-                output_file.close()
-                logging.error(f"Error during file collection: {e}")
-                self.root.after(0, lambda: messagebox.showerror("Error", f"Error during file collection: {e}"))
-                return
+            with open(args.output, "w", encoding="utf-8", newline="") as f:
+                f.write(text)
         except IOError as e:
-            logging.error(f"Failed to open output file: {e}")
-            self.root.after(0, lambda: messagebox.showerror("Error", f"Failed to open output file: {e}"))
-            return
+            print(f"Failed to write {args.output}: {e}")
+            return 1
+    else:
+        print(text)
+    return 0
+
+
+def main() -> None:
+    import multiprocessing
+    multiprocessing.freeze_support()
+    parser = argparse.ArgumentParser(description="File Collector App")
+    subparsers = parser.add_subparsers(dest="command")
+
+    search_parser = subparsers.add_parser("search", help="Search a project's collected content")
+    search_parser.add_argument("project", help="Project name")
+    search_parser.add_argument("query", help="Substring or regular expression to search for")
+    search_parser.add_argument("--regex", action="store_true", help="Treat the query as a regex")
+    search_parser.add_argument("-i", "--ignore-case", action="store_true", help="Case-insensitive match")
+    search_parser.add_argument("--limit", type=int, default=200, help="Maximum number of matches")
+
+    compact_parser = subparsers.add_parser(
+        "compact", help="Rebuild a full output set from a project's base and delta runs"
+    )
+    compact_parser.add_argument("project", help="Project name")
 
-        self.output_files = output_file_paths
-        self.files_changed = False
-        self.root.after(0, self.update_change_indicator)
-        self.root.after(0, self.update_output_files_tab)
-        # Update status label with timestamp
-        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-        self.root.after(0, lambda: self.change_indicator.configure(
-            text=f"Last run: {timestamp}",
-            fg_color=self.colors["status_success"],
-        ))
+    estimate_parser = subparsers.add_parser(
+        "estimate", help="Estimate a project's output size and part count without collecting"
+    )
+    estimate_parser.add_argument("project", help="Project name")
+    estimate_parser.add_argument(
+        "--sample", type=int, default=200, help="Files to sample for text ratio and tokens (0 = none)"
+    )
+    estimate_parser.add_argument("--top", type=int, default=10, help="Entries per top-N list")
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="Serve collections over HTTP on localhost"
+    )
+    serve_parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    serve_parser.add_argument(
+        "--cache-mb", type=int, default=256, help="Memory for cached file contents"
+    )
+
+    run_parser = subparsers.add_parser("run", help="Collect a project without opening the GUI")
+    run_parser.add_argument("project", help="Project name")
+
+    history_parser = subparsers.add_parser("history", help="Show or export a project's run history")
+    history_parser.add_argument("project", help="Project name")
+    history_parser.add_argument(
+        "--format", choices=["table", "csv", "json"], default="table", help="Output format"
+    )
+    history_parser.add_argument("--output", help="Write to this file instead of stdout")
+    history_parser.add_argument("--limit", type=int, default=0, help="Only the most recent N runs (0 = all)")
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve_collections(args.port, args.cache_mb)
+        return
+    if args.command == "estimate":
+        raise SystemExit(run_estimate_command(args))
+    if args.command == "search":
+        raise SystemExit(run_search_command(args))
+    if args.command == "compact":
+        raise SystemExit(run_compact_command(args))
+    if args.command == "run":
+        raise SystemExit(run_collect_command(args))
+    if args.command == "history":
+        raise SystemExit(run_history_command(args))
 
-if __name__ == "__main__":
     root = ctk.CTk()
     app = FileCollectorApp(root)
     root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
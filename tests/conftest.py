@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def config_dir(tmp_path, monkeypatch):
+    """Keep projects, prune caches and run history out of the user's config."""
+    path = tmp_path / "config"
+    monkeypatch.setenv("FILE_COLLECTOR_CONFIG_DIR", str(path))
+    main.config_dir.cache_clear()
+    yield path
+    main.config_dir.cache_clear()
+
+
+@pytest.fixture
+def make_project(tmp_path):
+    def make(files, **settings):
+        source = tmp_path / "src"
+        for name, content in files.items():
+            path = source / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if isinstance(content, bytes):
+                path.write_bytes(content)
+            else:
+                path.write_text(content, encoding="utf-8")
+        source.mkdir(exist_ok=True)
+        project = {
+            "folders": [str(source)],
+            "ignore_folders": [],
+            "ignore_filetypes": [],
+            "ignore_filenames": [],
+            "output_path": str(tmp_path / "out"),
+            "max_file_size": 1024,
+            "auto_detect": False,
+        }
+        project.update(settings)
+        return project
+
+    return make
+
+
+def read_parts(paths):
+    return [open(path, encoding="utf-8").read() for path in paths]
+
+
+def git(folder, *args):
+    subprocess.run(
+        ["git", "-C", str(folder), "-c", "user.name=t", "-c", "user.email=t@t", *args],
+        check=True,
+        capture_output=True,
+    )
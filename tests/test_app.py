@@ -0,0 +1,16 @@
+import json
+import types
+
+import main
+
+
+def test_projects_are_not_saved_before_they_have_loaded(config_dir):
+    config_dir.mkdir(exist_ok=True)
+    (config_dir / "projects.json").write_text(json.dumps({"existing": {"folders": []}}))
+    app = types.SimpleNamespace(projects={"new": {"folders": []}}, projects_loaded=False)
+    main.FileCollectorApp.save_projects_to_file(app)
+    assert json.loads((config_dir / "projects.json").read_text()) == {"existing": {"folders": []}}
+
+    app.projects_loaded = True
+    main.FileCollectorApp.save_projects_to_file(app)
+    assert json.loads((config_dir / "projects.json").read_text()) == {"new": {"folders": []}}
@@ -0,0 +1,62 @@
+import os
+
+import main
+from conftest import read_parts
+
+
+def out_of_time(collector):
+    collector.budget.started -= 100
+    return collector
+
+
+def test_time_limit_stops_the_packed_stat_pass(make_project):
+    project = make_project({f"f{i}.txt": "x\n" for i in range(20)}, pack_files=True, max_run_seconds=1)
+    collector = out_of_time(main.FileCollector("demo", project, presets={}))
+    collector.run()
+    assert collector.stats["files_read"] == 0
+    assert collector.budget.hits == ["max run time (1 s)"]
+
+
+def test_time_limit_stops_a_run_of_unreadable_files(make_project, tmp_path):
+    project = make_project({f"b{i}.bin": b"\xff\xfe" for i in range(5)}, max_run_seconds=1)
+    collector = out_of_time(main.FileCollector("demo", project, presets={}))
+    layout = [sorted(str(p) for p in (tmp_path / "src").iterdir())]
+    assert list(collector.read_results(layout, main.ContentTransformer(project))) == []
+    assert collector.stats["files_skipped"] == 1
+
+
+def test_max_files_limits_the_estimate(make_project):
+    project = make_project({f"f{i}.txt": "x\n" for i in range(10)}, max_files=3)
+    report = main.FileCollector("demo", project, presets={}).estimate()
+    assert report["files"] == 3
+    assert report["limits_hit"] == ["max files (3)"]
+    assert "Stopped early: max files (3)" in main.format_estimate(report)
+
+
+def test_cut_off_delta_listing_deletes_nothing(make_project):
+    project = make_project({f"f{i}.txt": f"{i}\n" for i in range(5)}, output_mode="delta")
+    main.FileCollector("demo", project, presets={}).run()
+    project["max_run_seconds"] = 1
+    paths = out_of_time(main.FileCollector("demo", project, presets={})).run()
+    assert "Deleted: 0" in open(paths[0], encoding="utf-8").read()
+    state = main.DeltaState(project["output_path"], "demo")
+    assert state.load() and len(state.files) == 5
+
+
+def test_max_output_marks_partial_output(make_project):
+    project = make_project({f"f{i}.txt": "x" * 100 + "\n" for i in range(10)}, max_output_kb=1)
+    collector = main.FileCollector("demo", project, presets={})
+    paths = collector.run()
+    assert collector.budget.hits == ["max output size (1 KB)"]
+    assert read_parts(paths)[-1].endswith("limits hit: max output size (1 KB) ===\n")
+    assert sum(os.path.getsize(p) for p in paths) < 1024 + 200
+
+
+def test_binaries_do_not_use_up_max_files_when_packing(make_project):
+    files = {f"b{i}.bin": b"\xff\xfe" for i in range(3)}
+    files.update({f"t{i}.txt": f"text {i}\n" for i in range(3)})
+    project = make_project(files, pack_files=True, max_files=3)
+    collector = main.FileCollector("demo", project, presets={})
+    collector.run()
+    assert collector.stats["files_written"] == 3
+    assert collector.budget.hits == []
@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+import main
+from conftest import read_parts
+
+
+def test_parts_are_split_at_the_size_limit(make_project):
+    project = make_project({f"f{i}.txt": f"{i}" * 300 + "\n" for i in range(4)}, max_file_size=0.5)
+    paths = main.FileCollector("demo", project, presets={}).run()
+    assert [os.path.basename(p) for p in paths] == [f"demo_output_{i}.txt" for i in range(1, 4)]
+    assert all(os.path.getsize(p) <= 512 for p in paths)
+    content = "".join(read_parts(paths))
+    assert content.count("File: ") == 4 and "0" * 300 in content and "3" * 300 in content
+
+
+def test_ignore_rules_and_output_folder_are_skipped(make_project, tmp_path):
+    project = make_project(
+        {"keep.py": "k\n", "skip.log": "s\n", "secret.env": "e\n", "cache/x.py": "c\n"},
+        ignore_folders=["cache"],
+        ignore_filetypes=[".log"],
+        ignore_filenames=["secret.env"],
+    )
+    # Output inside a collected folder must not collect itself
+    project["output_path"] = str(tmp_path / "src")
+    collector = main.FileCollector("demo", project, presets={})
+    collector.run()
+    assert [os.path.basename(p) for p in collector.iter_files()] == ["keep.py"]
+
+
+def test_missing_folders_raise_collection_error(make_project):
+    project = make_project({})
+    project["folders"] = []
+    with pytest.raises(main.CollectionError):
+        main.FileCollector("demo", project, presets={}).run()
+    assert main.load_history("demo")[-1]["error"] == "Folders or output path not specified."
+
+
+def test_full_runs_remove_parts_left_by_earlier_runs(make_project):
+    project = make_project({f"f{i}.txt": "x" * 1000 for i in range(3)}, max_file_size=1)
+    assert len(main.FileCollector("demo", project, presets={}).run()) > 2
+    outputs = os.path.join(project["output_path"], "outputs")
+    open(os.path.join(outputs, "demo_delta_1_1.txt"), "w").close()
+    project["max_files"] = 1
+    paths = main.FileCollector("demo", project, presets={}).run()
+    assert len(paths) == 2
+    parts = [f for f in os.listdir(outputs) if f.endswith(".txt")]
+    assert sorted(parts) == sorted(os.path.basename(p) for p in paths)
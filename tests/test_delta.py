@@ -0,0 +1,171 @@
+import os
+
+import main
+from conftest import git, read_parts
+
+
+def run(project):
+    return main.FileCollector("demo", project, presets={}).run()
+
+
+def delta_project(make_project, **settings):
+    return make_project({"a.txt": "one\ntwo\n", "b.txt": "same\n", "c.txt": "same\n"}, output_mode="delta", **settings)
+
+
+def test_delta_reports_added_modified_and_deleted_files(make_project, tmp_path):
+    project = delta_project(make_project)
+    base = run(project)
+    assert [os.path.basename(p) for p in base] == ["demo_output_1.txt"]
+    source = tmp_path / "src"
+    (source / "a.txt").write_text("one\nthree\n")
+    (source / "c.txt").unlink()
+    (source / "d.txt").write_text("new\n")
+    delta = run(project)
+    assert [os.path.basename(p) for p in delta] == ["demo_delta_1_1.txt"]
+    text = read_parts(delta)[0]
+    assert text.startswith("Delta 1 (changes since run 0)\nAdded: 1\nModified: 1\nDeleted: 1\n")
+    assert f"File: {source / 'a.txt'} (modified)\none\nthree\n" in text
+    assert f"File: {source / 'd.txt'} (added)\nnew\n" in text
+    assert f"Deleted: {source / 'c.txt'}" in text
+
+
+def test_touched_but_identical_files_are_not_reported(make_project, tmp_path):
+    project = delta_project(make_project)
+    run(project)
+    path = tmp_path / "src" / "b.txt"
+    os.utime(path, (1, 1))
+    text = read_parts(run(project))[0]
+    assert "Added: 0\nModified: 0\nDeleted: 0\n" in text
+
+
+def test_delta_diff_emits_unified_diffs(make_project, tmp_path):
+    project = delta_project(make_project, delta_diff=True)
+    run(project)
+    (tmp_path / "src" / "a.txt").write_text("one\nthree\n")
+    text = read_parts(run(project))[0]
+    assert "(modified, diff)\n" in text
+    assert "-two\n+three\n" in text
+
+
+def test_identical_contents_share_one_blob(make_project, tmp_path):
+    project = delta_project(make_project)
+    run(project)
+    state = main.DeltaState(project["output_path"], "demo")
+    assert state.load()
+    digest = state.files[str(tmp_path / "src" / "b.txt")]["hash"]
+    assert state.refs[digest] == 2
+    state.remove(str(tmp_path / "src" / "b.txt"))
+    assert os.path.exists(state.blob_path(digest))
+    state.remove(str(tmp_path / "src" / "c.txt"))
+    assert digest not in state.refs and not os.path.exists(state.blob_path(digest))
+
+
+def test_compact_rebuilds_the_full_output(make_project, tmp_path):
+    project = delta_project(make_project, build_index=True)
+    run(project)
+    (tmp_path / "src" / "a.txt").write_text("one\nthree\n")
+    run(project)
+    orphan = main.DeltaState(project["output_path"], "demo").store_blob(b"orphan")
+    compacted = main.FileCollector("demo", project, presets={}).compact()
+    outputs = os.listdir(os.path.join(project["output_path"], "outputs"))
+    assert not any("_delta_" in name for name in outputs)
+
+    state = main.DeltaState(project["output_path"], "demo")
+    assert state.load() and state.run == 0
+    assert not os.path.exists(state.blob_path(orphan))
+
+    project["output_mode"] = "full"
+    project["output_path"] = str(tmp_path / "fresh")
+    assert read_parts(compacted) == read_parts(run(project))
+
+
+def test_unified_diff_bytes_terminates_every_line():
+    diff = main.unified_diff_bytes(b"a\nb", b"a\nc", "f.txt").decode("utf-8")
+    assert diff.splitlines()[:2] == ["--- f.txt", "+++ f.txt"]
+    assert diff.endswith("+c\n")
+
+
+def test_changed_transforms_start_a_new_base(make_project, tmp_path):
+    project = make_project({"a.txt": "\n".join(str(i) for i in range(10))}, output_mode="delta")
+    run(project)
+    project["transforms"] = ["truncate"]
+    project["transform_options"] = {"truncate_head_lines": 2, "truncate_tail_lines": 0}
+    paths = run(project)
+    assert [os.path.basename(p) for p in paths] == ["demo_output_1.txt"]
+    assert "0\n1\n... [8 lines elided] ...\n" in read_parts(paths)[0]
+
+    # The new base is what later deltas and compaction build on
+    assert "Added: 0\nModified: 0\n" in read_parts(run(project))[0]
+    compacted = main.FileCollector("demo", project, presets={}).compact()
+    assert "... [8 lines elided] ..." in read_parts(compacted)[0]
+
+
+def search_paths(project, query):
+    index = main.SearchIndex(main.index_path_for(project["output_path"], "demo"))
+    assert index.load()
+    return sorted(os.path.basename(r["path"]) for r in index.search(query))
+
+
+def test_delta_runs_update_the_search_index(make_project, tmp_path):
+    project = delta_project(make_project, build_index=True)
+    (tmp_path / "src" / "b.txt").write_text("Needle upper\n")
+    run(project)
+    assert search_paths(project, "Needle") == ["b.txt"]
+
+    source = tmp_path / "src"
+    (source / "b.txt").write_text("brandnewword\n")
+    (source / "c.txt").unlink()
+    (source / "d.txt").write_text("another brandnewword\n")
+    run(project)
+    assert search_paths(project, "brandnewword") == ["b.txt", "d.txt"]
+    assert search_paths(project, "Needle") == []
+    assert search_paths(project, "same") == []
+    assert search_paths(project, "two") == ["a.txt"]
+
+    results = main.SearchIndex(main.index_path_for(project["output_path"], "demo"))
+    results.load()
+    assert {r["part"] for r in results.search("brandnewword")} == {"demo_delta_1_1.txt"}
+
+
+def test_files_written_as_diffs_leave_the_index(make_project, tmp_path):
+    project = delta_project(make_project, build_index=True, delta_diff=True)
+    run(project)
+    (tmp_path / "src" / "a.txt").write_text("one\nthree\n")
+    run(project)
+    assert search_paths(project, "one") == []
+    assert search_paths(project, "same") == ["b.txt", "c.txt"]
+
+
+def test_turning_on_the_index_starts_a_new_base(make_project):
+    project = delta_project(make_project)
+    run(project)
+    project["build_index"] = True
+    paths = run(project)
+    assert [os.path.basename(p) for p in paths] == ["demo_output_1.txt"]
+    assert search_paths(project, "two") == ["a.txt"]
+
+
+def test_delta_runs_prune_like_their_base(make_project):
+    presets = {"Node.js": {"ignore_folders": "node_modules", "ignore_filetypes": "", "ignore_filenames": ""}}
+    project = make_project(
+        {"package.json": "{}", "index.js": "run()\n", "node_modules/lib/m.js": "x\n"},
+        auto_detect=True,
+        output_mode="delta",
+    )
+    collector = main.FileCollector("demo", project, presets=presets)
+    collector.run()
+    assert "pruned 1 folder(s)" in collector.prune_report
+    paths = main.FileCollector("demo", project, presets=presets).run()
+    assert read_parts(paths)[0].startswith("Delta 1 (changes since run 0)\nAdded: 0\n")
+
+
+def test_delta_base_ignores_changed_since(make_project, tmp_path):
+    project = make_project({"a.txt": "a\n", "b.txt": "b\n"}, output_mode="delta", source_mode="git")
+    source = tmp_path / "src"
+    git(source, "init", "-q")
+    git(source, "add", ".")
+    git(source, "commit", "-q", "-m", "initial")
+    project["git_changed_since"] = "HEAD"
+    run(project)
+    state = main.DeltaState(project["output_path"], "demo")
+    assert state.load() and sorted(map(os.path.basename, state.files)) == ["a.txt", "b.txt"]
@@ -0,0 +1,58 @@
+import os
+
+import main
+
+PRESETS = {
+    "Node.js": {"ignore_folders": "node_modules,dist", "ignore_filetypes": ".map", "ignore_filenames": ""},
+    "Python": {"ignore_folders": "venv,__pycache__", "ignore_filetypes": ".pyc", "ignore_filenames": ""},
+}
+
+
+def node_project(make_project, modules=50):
+    files = {"app/package.json": "{}", "app/index.js": "run()\n", "app/index.js.map": "{}"}
+    for i in range(modules):
+        files[f"app/node_modules/lib/m{i}.js"] = "x\n"
+    files["tool/venv/lib.py"] = "y\n"
+    files["tool/main.py"] = "z\n"
+    return make_project(files, auto_detect=True)
+
+
+def relative(paths, project):
+    return sorted(os.path.relpath(p, project["folders"][0]).replace(os.sep, "/") for p in paths)
+
+
+def test_presets_apply_only_below_their_marker(make_project):
+    project = node_project(make_project)
+    detector = main.ProjectDetector(PRESETS)
+    files = main.FileCollector("demo", project, presets=PRESETS).iter_files(detector=detector)
+    # No Python marker in tool/, so its venv is kept
+    assert relative(files, project) == [
+        "app/index.js", "app/package.json", "tool/main.py", "tool/venv/lib.py"
+    ]
+    report = detector.report()
+    assert report["detected"] == {os.path.join(project["folders"][0], "app"): ["Node.js"]}
+    assert report["entries"] == 51 and report["complete"]
+
+
+def test_pruned_directories_are_measured_with_a_bound(make_project, monkeypatch):
+    monkeypatch.setattr(main, "PRUNE_MEASURE_ENTRIES", 10)
+    project = node_project(make_project)
+    detector = main.ProjectDetector(PRESETS)
+    list(main.FileCollector("demo", project, presets=PRESETS).iter_files(detector=detector))
+    report = detector.report()
+    assert report["entries"] == 10 and not report["complete"]
+    assert "at least 10 entries" in main.format_prune_report(report)
+
+
+def test_pruned_directories_are_only_measured_for_the_report(make_project, monkeypatch):
+    project = node_project(make_project)
+    measured = []
+    original = main.ProjectDetector.measure
+    monkeypatch.setattr(
+        main.ProjectDetector, "measure", lambda self, path: measured.append(path) or original(self, path)
+    )
+    report = main.FileCollector("demo", project, presets=PRESETS).estimate()
+    assert report["files"] == 4 and measured == []
+    collector = main.FileCollector("demo", project, presets=PRESETS)
+    collector.run()
+    assert len(measured) == 1 and "51 entries" in collector.prune_report
@@ -0,0 +1,9 @@
+import main
+
+
+def test_estimate_counts_files_and_parts(make_project):
+    project = make_project({"a/x.py": "x" * 1000, "a/y.py": "y" * 1000, "b/z.md": "z" * 500}, max_file_size=1)
+    report = main.FileCollector("demo", project, presets={}).estimate(sample_files=3)
+    assert report["files"] == 3 and report["parts"] == 3
+    assert report["text_ratio"] == 1.0 and report["tokens"] > 0
+    assert report["largest_extensions"][0][0] == ".py"
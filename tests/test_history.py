@@ -0,0 +1,39 @@
+import csv
+import io
+
+import main
+
+
+def test_traversal_is_timed_as_scan_in_every_mode(make_project):
+    for pack_files in (False, True):
+        project = make_project({f"d{i}/f{i}.txt": "x\n" for i in range(20)}, pack_files=pack_files)
+        collector = main.FileCollector("demo", project, presets={})
+        collector.run()
+        record = main.load_history("demo")[-1]
+        assert {"scan", "read", "write", "finalize"} <= set(record["stages"]), pack_files
+        assert collector.stats["stages"]["scan"] > 0
+
+
+def test_runs_are_recorded_with_their_trigger(make_project):
+    project = make_project({"a.txt": "a\n", "b.bin": b"\xff"})
+    main.FileCollector("demo", project, presets={}, trigger="cli").run()
+    record = main.load_history("demo")[-1]
+    assert record["trigger"] == "cli" and record["mode"] == "full"
+    assert (record["files_read"], record["files_skipped"], record["parts"]) == (1, 1, 1)
+
+
+def test_sparkline_scales_between_min_and_max():
+    assert main.sparkline([]) == ""
+    assert main.sparkline([1, 1]) == main.SPARK_CHARS[0] * 2
+    assert main.sparkline([0, 5, 10]) == main.SPARK_CHARS[0] + main.SPARK_CHARS[3] + main.SPARK_CHARS[-1]
+
+
+def test_csv_export_has_a_column_per_stage():
+    records = [
+        {"timestamp": "t1", "trigger": "manual", "stages": {"read": 1.5}, "limits_hit": ["max files (3)"]},
+        {"timestamp": "t2", "trigger": "cli", "stages": {"scan": 0.5}, "limits_hit": []},
+    ]
+    rows = list(csv.DictReader(io.StringIO(main.export_history(records, "csv"))))
+    assert [row["stage_read"] for row in rows] == ["1.5", ""]
+    assert [row["stage_scan"] for row in rows] == ["", "0.5"]
+    assert rows[0]["limits_hit"] == "max files (3)"
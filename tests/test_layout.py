@@ -0,0 +1,39 @@
+import os
+
+import main
+from conftest import read_parts
+
+
+def test_plan_keeps_small_directories_together():
+    entries = [("d/a", 40), ("d/b", 40), ("e/c", 90), ("e/d", 15)]
+    assert main.plan_packed_layout(entries, 100) == [["d/a", "d/b", "e/d"], ["e/c"]]
+
+
+def test_plan_gives_oversized_files_their_own_parts():
+    entries = [("d/big", 250), ("d/small", 40)]
+    assert main.plan_packed_layout(entries, 100) == [["d/big", "d/small"]]
+    assert main.plan_packed_layout([("d/big", 280), ("d/small", 40)], 100) == [
+        ["d/big"], ["d/small"]
+    ]
+
+
+def test_unreadable_first_file_still_starts_its_part(make_project, tmp_path):
+    project = make_project({"t1.txt": "one\n", "b0.bin": b"\x89PNG\xff\xfe", "t2.txt": "two\n"})
+    source = tmp_path / "src"
+    layout = [[str(source / "t1.txt")], [str(source / "b0.bin"), str(source / "t2.txt")]]
+    collector = main.FileCollector("demo", project, presets={})
+    results = list(collector.read_results(layout, main.ContentTransformer(project)))
+    assert [(os.path.basename(r[0]), r[1]) for r in results] == [("t1.txt", True), ("t2.txt", True)]
+    assert collector.stats["files_skipped"] == 1
+
+
+def test_packed_parts_never_split_text_files(make_project):
+    files = {f"t{i}.txt": f"<t{i}>" + "x" * (30 + 10 * i) + "\n" for i in range(6)}
+    files["b0.bin"] = b"\x89PNG" + b"\xff" * 120
+    project = make_project(files, max_file_size=0.25, pack_files=True)
+    parts = read_parts(main.FileCollector("demo", project, presets={}).run())
+    for name, content in files.items():
+        if name.endswith(".txt"):
+            assert sum(content in part for part in parts) == 1, name
+    assert main.is_text_file(os.path.join(project["folders"][0], "t0.txt"))
+    assert not main.is_text_file(os.path.join(project["folders"][0], "b0.bin"))
@@ -0,0 +1,71 @@
+import json
+import os
+
+import main
+
+
+def collect(project, name="demo"):
+    return main.FileCollector(name, project, presets={}).run()
+
+
+def open_index(project, name="demo"):
+    index = main.SearchIndex(main.index_path_for(project["output_path"], name))
+    assert index.load()
+    return index
+
+
+def test_required_literals():
+    assert main.required_literals(r"foo\.bar") == ["foo.bar"]
+    assert main.required_literals(r"abc\d+xyz") == ["abc", "xyz"]
+    assert main.required_literals(r"ab?cd") == ["a", "cd"]
+    assert main.required_literals(r"x{2,3}yz") == ["yz"]
+    assert main.required_literals(r"foo|bar") == []
+    assert main.required_literals(r"(abc)def[ghi]jk") == ["def", "jk"]
+
+
+def test_search_finds_lines_in_parts(make_project):
+    project = make_project(
+        {"a.txt": "alpha\nneedle here\n", "b.txt": "nothing\n", "c.txt": "Ünïcode needle\n"},
+        build_index=True,
+    )
+    collect(project)
+    index = open_index(project)
+    results = index.search("needle")
+    assert sorted((os.path.basename(r["path"]), r["line"]) for r in results) == [
+        ("a.txt", 2), ("c.txt", 1)
+    ]
+    assert [os.path.basename(r["path"]) for r in index.search("ünïcode", ignore_case=True)] == ["c.txt"]
+    assert [os.path.basename(r["path"]) for r in index.search(r"nee\w+ here", regex=True)] == ["a.txt"]
+    assert index.search("missing") == []
+
+
+def test_unchanged_files_reuse_postings(make_project, tmp_path):
+    project = make_project({"a.txt": "first marker\n", "b.txt": "second\n"}, build_index=True)
+    collect(project)
+    (tmp_path / "src" / "b.txt").write_text("second changed marker\n", encoding="utf-8")
+    collect(project)
+    index = open_index(project)
+    assert sorted(os.path.basename(r["path"]) for r in index.search("marker")) == ["a.txt", "b.txt"]
+    assert [os.path.basename(r["path"]) for r in index.search("first")] == ["a.txt"]
+
+
+def test_json_index_from_previous_version_is_rebuilt(make_project):
+    project = make_project({"a.txt": "hello\n"}, build_index=True)
+    path = main.index_path_for(project["output_path"], "demo")
+    os.makedirs(os.path.dirname(path))
+    with open(path, "w") as f:
+        json.dump({"version": 1, "parts": [], "files": [], "trigrams": {}}, f)
+    assert not main.SearchIndex(path).load()
+    collect(project)
+    assert [r["text"] for r in open_index(project).search("hello")] == ["hello"]
+
+
+def test_changed_transforms_reindex_unchanged_files(make_project):
+    project = make_project(
+        {"a.py": "# secretmarker\nvalue = 1\n"}, build_index=True, transforms=["strip_comments"]
+    )
+    collect(project)
+    assert open_index(project).search("secretmarker") == []
+    project["transforms"] = []
+    collect(project)
+    assert [r["text"] for r in open_index(project).search("secretmarker")] == ["# secretmarker"]
@@ -0,0 +1,135 @@
+import http.client
+import json
+import os
+import threading
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def server(make_project, config_dir):
+    project = make_project({"app/index.js": "run()\n", "app/lib/util.js": "util()\n", "README": "hi\n"})
+    config_dir.mkdir(exist_ok=True)
+    (config_dir / "projects.json").write_text(json.dumps({"demo": project}))
+    server = main.make_collection_server(0, 1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get(server, path, host=None, headers=None):
+    port = server.server_address[1]
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    request_headers = {"Host": host or f"127.0.0.1:{port}"}
+    request_headers.update(headers or {})
+    connection.request("GET", path, headers=request_headers)
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    return response, body
+
+
+def test_lists_projects(server):
+    response, body = get(server, "/projects")
+    assert response.status == 200 and json.loads(body) == ["demo"]
+    port = server.server_address[1]
+    assert get(server, "/projects", host=f"localhost:{port}")[0].status == 200
+
+
+def test_rejects_foreign_host_headers(server):
+    port = server.server_address[1]
+    response, _ = get(server, "/projects", host=f"evil.example:{port}")
+    assert response.status == 403
+    assert get(server, "/projects", host="127.0.0.1:1")[0].status == 403
+
+
+def test_compile_glob_keeps_wildcards_within_a_segment():
+    glob = main.compile_glob
+    assert glob("app/*.js").match("app/index.js")
+    assert not glob("app/*.js").match("app/node_modules/lib/x.js")
+    assert not glob("*.js").match("app/index.js")
+    assert glob("**/*.js").match("index.js") and glob("**/*.js").match("a/b/index.js")
+    assert glob("app/**").match("app/a/b.txt")
+    assert glob("a/**/b.txt").match("a/b.txt") and glob("a/**/b.txt").match("a/x/y/b.txt")
+    assert glob("[!a]*.py").match("b.py") and not glob("[!a]*.py").match("a.py")
+    assert not glob("f?o").match("f/o")
+
+
+def collected_names(body):
+    return sorted(
+        line.split("/src/", 1)[1] for line in body.decode("utf-8").splitlines() if line.startswith("File: ")
+    )
+
+
+def test_collect_filters_by_segment_glob(server):
+    response, body = get(server, "/projects/demo/collect?glob=app/*.js")
+    assert response.status == 200
+    assert collected_names(body) == ["app/index.js"]
+    _, body = get(server, "/projects/demo/collect?glob=**/*.js")
+    assert collected_names(body) == ["app/index.js", "app/lib/util.js"]
+
+
+def test_collect_matches_globs_against_the_right_root(server, config_dir, tmp_path):
+    projects = json.loads((config_dir / "projects.json").read_text())
+    (tmp_path / "src" / "applib").mkdir()
+    (tmp_path / "src" / "applib" / "x.js").write_text("x\n")
+    projects["demo"]["folders"] = [str(tmp_path / "src" / "app"), str(tmp_path / "src" / "applib")]
+    (config_dir / "projects.json").write_text(json.dumps(projects))
+    _, body = get(server, "/projects/demo/collect?glob=*.js")
+    assert collected_names(body) == ["app/index.js", "applib/x.js"]
+
+
+def test_parts_are_listed_in_natural_order_and_served_with_ranges(server, config_dir):
+    project = json.loads((config_dir / "projects.json").read_text())["demo"]
+    outputs = os.path.join(project["output_path"], "outputs")
+    os.makedirs(outputs)
+    for i in (1, 2, 10):
+        with open(os.path.join(outputs, f"demo_output_{i}.txt"), "w") as f:
+            f.write("0123456789")
+    _, body = get(server, "/projects/demo/parts")
+    assert [p["name"] for p in json.loads(body)] == [
+        "demo_output_1.txt", "demo_output_2.txt", "demo_output_10.txt"
+    ]
+
+    path = "/projects/demo/parts/demo_output_10.txt"
+    response, body = get(server, path)
+    assert response.status == 200 and body == b"0123456789"
+    for header, expected, content_range in (
+        ("bytes=2-4", b"234", "bytes 2-4/10"),
+        ("bytes=7-", b"789", "bytes 7-9/10"),
+        ("bytes=-3", b"789", "bytes 7-9/10"),
+        ("bytes=8-100", b"89", "bytes 8-9/10"),
+    ):
+        response, body = get(server, path, headers={"Range": header})
+        assert (response.status, body, response.getheader("Content-Range")) == (206, expected, content_range)
+    for header in ("bytes=10-", "bytes=5-2", "bytes=-", "lines=1-2"):
+        assert get(server, path, headers={"Range": header})[0].status == 416
+    assert get(server, "/projects/demo/parts/..%2Fprojects.json")[0].status == 404
+
+
+def update_project(config_dir, **settings):
+    projects = json.loads((config_dir / "projects.json").read_text())
+    projects["demo"].update(settings)
+    (config_dir / "projects.json").write_text(json.dumps(projects))
+    return projects["demo"]
+
+
+def test_collect_stops_at_the_project_budget(server, config_dir):
+    update_project(config_dir, max_files=1)
+    _, body = get(server, "/projects/demo/collect")
+    assert len(collected_names(body)) == 1
+    assert body.decode("utf-8").endswith("limits hit: max files (1) ===\n")
+
+
+def test_collect_shares_the_transform_cache_of_full_runs(server, config_dir, tmp_path):
+    large = "line   \n" * main.TRANSFORM_CACHE_MIN_BYTES
+    (tmp_path / "src" / "big.py").write_text(large)
+    project = update_project(config_dir, transforms=["strip_trailing_whitespace"])
+    _, body = get(server, "/projects/demo/collect?glob=big.py")
+    assert collected_names(body) == ["big.py"]
+    cache_dir = main.cache_dir_for(project["output_path"], "demo_transforms")
+    assert [f for _, _, files in os.walk(cache_dir) for f in files]
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+import main
+from conftest import git
+
+
+@pytest.fixture
+def repo(make_project, tmp_path):
+    project = make_project(
+        {"a.txt": "a\n", "b.txt": "b\n", "build/out.txt": "x\n", ".gitignore": "build/\n"},
+        source_mode="git",
+    )
+    source = tmp_path / "src"
+    git(source, "init", "-q")
+    git(source, "add", ".")
+    git(source, "commit", "-q", "-m", "initial")
+    return project, source
+
+
+def names(paths, source):
+    return sorted(os.path.relpath(p, source).replace(os.sep, "/") for p in paths)
+
+
+def test_git_mode_honours_gitignore(repo):
+    project, source = repo
+    collector = main.FileCollector("demo", project, presets={})
+    assert names(collector.iter_files(), source) == [".gitignore", "a.txt", "b.txt"]
+
+
+def test_changed_since_lists_changes_and_untracked_files(repo):
+    project, source = repo
+    (source / "a.txt").write_text("changed\n")
+    (source / "new.txt").write_text("new\n")
+    project["git_changed_since"] = "HEAD"
+    collector = main.FileCollector("demo", project, presets={})
+    assert names(collector.iter_files(), source) == ["a.txt", "new.txt"]
+
+
+def test_invalid_ref_is_an_error_not_a_full_walk(repo):
+    project, source = repo
+    project["git_changed_since"] = "HEDA"
+    with pytest.raises(main.CollectionError, match="HEDA"):
+        list(main.FileCollector("demo", project, presets={}).iter_files())
+    with pytest.raises(main.CollectionError):
+        main.FileCollector("demo", project, presets={}).run()
+
+
+def test_folder_outside_a_repository_is_walked(make_project, tmp_path):
+    project = make_project({"a.txt": "a\n"}, source_mode="git", git_changed_since="HEAD")
+    collector = main.FileCollector("demo", project, presets={})
+    assert names(collector.iter_files(), tmp_path / "src") == ["a.txt"]
+
+
+def test_files_deleted_from_the_work_tree_are_not_listed(repo):
+    project, source = repo
+    (source / "b.txt").unlink()
+    collector = main.FileCollector("demo", project, presets={})
+    assert names(collector.iter_files(), source) == [".gitignore", "a.txt"]
+    collector.run()
+    assert collector.stats["files_skipped"] == 0
@@ -0,0 +1,100 @@
+import os
+
+import main
+
+OPTIONS = main.DEFAULT_TRANSFORM_OPTIONS
+
+
+def test_strip_trailing_whitespace():
+    assert main.strip_trailing_whitespace("a  \nb\t\n", ".txt", OPTIONS) == "a\nb\n"
+
+
+def test_collapse_blank_lines():
+    assert main.collapse_blank_lines("a\n\n\n  \n\nb\n\nc", ".md", OPTIONS) == "a\n\nb\n\nc"
+
+
+def test_strip_comments_removes_whole_line_comments_only():
+    source = "#!/usr/bin/env python\n# comment\nx = 1  # kept\n"
+    assert main.strip_comments(source, ".py", OPTIONS) == "#!/usr/bin/env python\nx = 1  # kept\n"
+    js = "/* block\n   comment */\nrun(); // kept\n// gone\n/* one line */ call();\n"
+    assert main.strip_comments(js, ".js", OPTIONS) == "run(); // kept\n/* one line */ call();\n"
+    assert main.strip_comments("# heading\n", ".md", OPTIONS) == "# heading\n"
+
+
+def test_strip_license_header():
+    source = "# Copyright 2020 Someone\n# Licensed under MIT\n\nimport os\n"
+    assert main.strip_license_header(source, ".py", OPTIONS) == "import os\n"
+    plain = "# Helpers for parsing\nimport os\n"
+    assert main.strip_license_header(plain, ".py", OPTIONS) == plain
+
+
+def test_truncate_keeps_head_and_tail():
+    content = "\n".join(str(i) for i in range(10))
+    options = {"truncate_head_lines": 2, "truncate_tail_lines": 3}
+    assert main.truncate_large(content, ".txt", options) == "0\n1\n... [5 lines elided] ...\n7\n8\n9"
+    assert main.truncate_large("a\nb", ".txt", options) == "a\nb"
+
+
+def test_extension_transforms_round_trip():
+    text = ".js,.ts=strip_comments+truncate; .md=collapse_blank_lines"
+    parsed = main.parse_extension_transforms(text)
+    assert parsed == {
+        ".js": ["strip_comments", "truncate"],
+        ".ts": ["strip_comments", "truncate"],
+        ".md": ["collapse_blank_lines"],
+    }
+    assert main.parse_extension_transforms(main.format_extension_transforms(parsed)) == parsed
+
+
+def test_transformer_prefers_extension_rules_and_caches_large_results(tmp_path):
+    project = {
+        "transforms": ["strip_trailing_whitespace", "unknown"],
+        "extension_transforms": {".md": []},
+    }
+    transformer = main.ContentTransformer(project, str(tmp_path / "cache"))
+    assert transformer.default == ["strip_trailing_whitespace"]
+    assert transformer.apply("a  \n", "x.py") == "a\n"
+    assert transformer.apply("a  \n", "x.md") == "a  \n"
+
+    large = "line   \n" * main.TRANSFORM_CACHE_MIN_BYTES
+    first = transformer.apply(large, "x.py")
+    assert (transformer.cache_hits, transformer.cache_misses) == (0, 1)
+    assert transformer.apply(large, "x.py") == first == "line\n" * main.TRANSFORM_CACHE_MIN_BYTES
+    assert (transformer.cache_hits, transformer.cache_misses) == (1, 1)
+
+    other = main.ContentTransformer({"transforms": ["collapse_blank_lines"]})
+    assert other.fingerprint != transformer.fingerprint
+
+
+def cache_entries(project, name="demo"):
+    cache_dir = os.path.join(project["output_path"], "outputs", ".file_collector", f"{name}_transforms")
+    return sorted(os.path.join(root, f) for root, _, files in os.walk(cache_dir) for f in files)
+
+
+def test_full_runs_drop_cache_entries_they_did_not_use(make_project, tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "TRANSFORM_CACHE_MTIME_SLACK", 0)
+    large = "line   \n" * main.TRANSFORM_CACHE_MIN_BYTES
+    project = make_project({"a.py": large, "b.py": large + "b"}, transforms=["strip_trailing_whitespace"])
+    main.FileCollector("demo", project, presets={}).run()
+    first = cache_entries(project)
+    assert len(first) == 2
+
+    (tmp_path / "src" / "b.py").write_text(large + "changed")
+    for path in first:
+        os.utime(path, (1, 1))
+    main.FileCollector("demo", project, presets={}).run()
+    second = cache_entries(project)
+    # a.py was a hit and kept; b.py's old entry was replaced
+    assert len(second) == 2 and len(set(first) & set(second)) == 1
+
+
+def test_partial_runs_keep_the_cache(make_project, monkeypatch):
+    monkeypatch.setattr(main, "TRANSFORM_CACHE_MTIME_SLACK", 0)
+    large = "line   \n" * main.TRANSFORM_CACHE_MIN_BYTES
+    project = make_project({"a.py": large, "b.py": large + "b"}, transforms=["strip_trailing_whitespace"])
+    main.FileCollector("demo", project, presets={}).run()
+    for path in cache_entries(project):
+        os.utime(path, (1, 1))
+    project["max_files"] = 1
+    main.FileCollector("demo", project, presets={}).run()
+    assert len(cache_entries(project)) == 2
@@ -0,0 +1,36 @@
+import main
+from conftest import read_parts
+
+
+def test_worker_pool_output_matches_serial_output(make_project, tmp_path):
+    files = {f"d{i % 3}/f{i}.txt": f"content {i}\n" * (i + 1) for i in range(150)}
+    files["bad.bin"] = b"\xff\xfe"
+    project = make_project(files, max_file_size=2)
+    serial = read_parts(main.FileCollector("demo", project, presets={}).run())
+    project["workers"] = 2
+    project["output_path"] = str(tmp_path / "pooled")
+    assert read_parts(main.FileCollector("demo", project, presets={}).run()) == serial
+
+
+def test_batches_keep_failed_reads_in_order(make_project, tmp_path):
+    project = make_project({"a.txt": "a\n", "b.bin": b"\xff", "c.txt": "c\n"})
+    paths = [str(tmp_path / "src" / name) for name in ("a.txt", "b.bin", "c.txt")]
+    transformer = main.ContentTransformer(project)
+    for use_shared_memory in (False, True):
+        result = main.process_file_batch(paths, transformer, use_shared_memory)
+        entries = list(main.unpack_file_batch(result))
+        assert [path for path, _ in entries] == paths
+        assert entries[0][1][0] == b"a\n" and entries[2][1][0] == b"c\n"
+        assert isinstance(entries[1][1], UnicodeDecodeError)
+
+
+def test_pooled_runs_count_each_cache_lookup_once(make_project, monkeypatch):
+    # Later batches are submitted after earlier ones were added up
+    monkeypatch.setattr(main, "WORKER_BATCH_SIZE", 2)
+    large = "line   \n" * main.TRANSFORM_CACHE_MIN_BYTES
+    files = {f"big{i}.py": large + str(i) for i in range(8)}
+    project = make_project(files, workers=1, max_file_size=4096, transforms=["strip_trailing_whitespace"])
+    for expected in ((0, 8), (8, 0)):
+        collector = main.FileCollector("demo", project, presets={})
+        collector.run()
+        assert (collector.stats["cache_hits"], collector.stats["cache_misses"]) == expected